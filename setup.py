@@ -33,7 +33,7 @@ setup(
         "rich>=12.0.1",
         "scipy>=1.4.1",
         "tqdm>=4.48.0",
-        "txtai[graph]>=6.0.0",
+        "txtai[graph]>=6.2.0",
     ],
     classifiers=[
         "License :: OSI Approved :: Apache Software License",
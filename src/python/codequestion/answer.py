@@ -0,0 +1,34 @@
+"""
+Answer module
+"""
+
+import re
+
+import html2markdown
+
+
+class Answer:
+    """
+    Converts answer html to markdown.
+    """
+
+    @staticmethod
+    def markdown(text):
+        """
+        Converts html text to markdown text.
+
+        Args:
+            text: html text
+
+        Returns:
+            markdown text
+        """
+
+        # Remove rel attributes as they are not supported by html2markdown
+        text = re.sub(r' rel=".+?">', ">", text)
+
+        # Convert html to markdown
+        text = html2markdown.convert(text)
+
+        # Decode [<>&] characters
+        return text.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
@@ -0,0 +1,276 @@
+"""
+AsyncSearch module
+"""
+
+import asyncio
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .answer import Answer
+from .search import Search
+
+
+class AsyncSearch:
+    """
+    Asyncio search interface. Concurrent queries are micro-batched into a single encode call. Encoding and ANN search run
+    on a worker thread so the event loop is never blocked.
+
+    Batches run one at a time. The embeddings index and its content database connection aren't safe for concurrent
+    batch queries, so batches are serialized on a single worker thread. Queries that arrive while a batch runs are
+    collected into the next batch.
+    """
+
+    # Result fields
+    FIELDS = [
+        "id",
+        "score",
+        "question",
+        "questionuser",
+        "tags",
+        "date",
+        "answer",
+        "answeruser",
+        "reference",
+    ]
+
+    def __init__(self, search=None, batch=32, wait=0.005, window=1000):
+        """
+        Creates a new async search instance.
+
+        Args:
+            search: optional Search instance, a new instance is loaded if not provided
+            batch: maximum number of queries per batch
+            wait: maximum number of seconds to wait for more queries before running a batch
+            window: number of recent requests used for latency metrics
+        """
+
+        self.search = search if search else Search(verbose=False)
+        self.batch, self.wait = batch, wait
+
+        # Single worker thread, batches are serialized
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        # Pending queries and batch scheduler, created on first use within the running event loop
+        self.queue, self.scheduler, self.slots = None, None, None
+
+        # Running batch tasks
+        self.tasks = set()
+
+        # Metrics
+        self.requests, self.batches, self.inflight = 0, 0, 0
+        self.latencies = deque(maxlen=window)
+
+    async def __call__(self, query, limit=1):
+        """
+        Runs a search query.
+
+        Args:
+            query: query string
+            limit: maximum number of results
+
+        Returns:
+            list of results, each result is a dict with the fields in AsyncSearch.FIELDS
+        """
+
+        if not self.scheduler:
+            self.queue, self.slots = asyncio.Queue(), asyncio.Semaphore(1)
+            self.scheduler = asyncio.create_task(self.schedule())
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((query, limit, future, time.perf_counter()))
+
+        return await future
+
+    async def schedule(self):
+        """
+        Collects pending queries into batches and runs each batch on the thread pool.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        requests = []
+        try:
+            while True:
+                # Wait for the first query, then gather more until the batch is full or the wait time expires
+                requests = [await self.queue.get()]
+                deadline = loop.time() + self.wait
+                while len(requests) < self.batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+
+                    try:
+                        requests.append(
+                            await asyncio.wait_for(self.queue.get(), timeout)
+                        )
+                    except asyncio.TimeoutError:
+                        break
+
+                # Wait for the running batch to complete
+                await self.slots.acquire()
+                task = asyncio.create_task(self.execute(requests))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+                requests = []
+
+        except asyncio.CancelledError:
+            # Fail requests collected for a batch that never started
+            self.fail(requests)
+            raise
+
+    async def execute(self, requests):
+        """
+        Runs a batch of requests on the thread pool and resolves each request future.
+
+        Args:
+            requests: list of (query, limit, future, start time)
+        """
+
+        self.inflight += 1
+
+        # pylint: disable=W0703
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                self.run,
+                [(query, limit) for query, limit, _, _ in requests],
+            )
+
+            for (_, _, future, _), result in zip(requests, results):
+                if not future.done():
+                    future.set_result(result)
+
+        except Exception as e:
+            for _, _, future, _ in requests:
+                if not future.done():
+                    future.set_exception(e)
+
+        finally:
+            self.inflight -= 1
+            self.slots.release()
+
+            # Update metrics
+            end = time.perf_counter()
+            self.requests += len(requests)
+            self.batches += 1
+            self.latencies.extend(end - start for _, _, _, start in requests)
+
+    def fail(self, requests):
+        """
+        Resolves request futures with an error, used when requests are dropped on close.
+
+        Args:
+            requests: list of (query, limit, future, start time)
+        """
+
+        for _, _, future, _ in requests:
+            if not future.done():
+                future.set_exception(RuntimeError("AsyncSearch is closed"))
+
+    def run(self, requests):
+        """
+        Runs a batch of queries. Queries are grouped by limit and each group is encoded with a single call.
+
+        Args:
+            requests: list of (query, limit)
+
+        Returns:
+            list of results per request
+        """
+
+        # Group queries by limit
+        groups = {}
+        for x, (query, limit) in enumerate(requests):
+            groups.setdefault(limit, []).append((x, query))
+
+        results = [None] * len(requests)
+        for limit, group in groups.items():
+            batch = self.search.batch([query for _, query in group], limit)
+
+            for (x, _), result in zip(group, batch):
+                results[x] = [self.result(row) for row in result]
+
+        return results
+
+    def result(self, row):
+        """
+        Builds a structured result from a search result row. The answer is converted to markdown.
+
+        Args:
+            row: search result row
+
+        Returns:
+            dict with the fields in AsyncSearch.FIELDS
+        """
+
+        result = {field: row.get(field) for field in AsyncSearch.FIELDS}
+        if result["answer"] and row.get("format") != "markdown":
+            result["answer"] = Answer.markdown(result["answer"])
+
+        return result
+
+    def metrics(self):
+        """
+        Gets queue depth, batching and latency metrics.
+
+        Returns:
+            dict of metrics, latencies are in milliseconds
+        """
+
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            return (
+                latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+                if latencies
+                else 0.0
+            )
+
+        return {
+            "queue": self.queue.qsize() if self.queue else 0,
+            "inflight": self.inflight,
+            "requests": self.requests,
+            "batches": self.batches,
+            "batchsize": self.requests / self.batches if self.batches else 0.0,
+            "latency": {
+                "mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": latencies[-1] * 1000 if latencies else 0.0,
+            },
+        }
+
+    async def close(self):
+        """
+        Stops the batch scheduler and shuts down the thread pool. Running batches complete, queued requests that
+        were never batched fail with a RuntimeError.
+        """
+
+        if self.scheduler:
+            # Stop collecting new batches
+            self.scheduler.cancel()
+            try:
+                await self.scheduler
+            except asyncio.CancelledError:
+                pass
+
+            self.scheduler = None
+
+            # Fail queued requests
+            requests = []
+            while not self.queue.empty():
+                requests.append(self.queue.get_nowait())
+
+            self.fail(requests)
+
+            # Wait for running batches to resolve their requests
+            if self.tasks:
+                await asyncio.gather(*self.tasks, return_exceptions=True)
+
+        # Shut down the thread pool without blocking the event loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.executor.shutdown, True
+        )
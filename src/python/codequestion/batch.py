@@ -0,0 +1,118 @@
+"""
+Batch module
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import sys
+import time
+
+from .search import Search
+
+
+class Batch:
+    """
+    Runs batches of search queries and writes results as JSONL.
+    """
+
+    def __init__(self, search=None):
+        """
+        Creates a new batch action.
+
+        Args:
+            search: optional Search instance, a new instance is loaded if not provided
+        """
+
+        # Load search instance, keep stdout clean for results
+        if not search:
+            with contextlib.redirect_stdout(sys.stderr):
+                search = Search()
+
+        self.search = search
+
+    def __call__(self, queries, output, limit=1, size=64):
+        """
+        Runs search queries in batches. Each query is written to output as a JSON line with the query and results.
+
+        Args:
+            queries: iterable of query strings
+            output: output file
+            limit: maximum number of results per query
+            size: number of queries encoded per batch
+
+        Returns:
+            number of queries run
+        """
+
+        # Skip empty lines
+        queries = (query.strip() for query in queries)
+        queries = (query for query in queries if query)
+
+        count, start = 0, time.time()
+
+        batch = list(itertools.islice(queries, size))
+        while batch:
+            for query, results in zip(batch, self.search.batch(batch, limit)):
+                output.write(json.dumps({"query": query, "results": results}) + "\n")
+
+            count += len(batch)
+            batch = list(itertools.islice(queries, size))
+
+        elapsed = time.time() - start
+        print(
+            f"Ran {count} queries in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.2f} queries/sec)",
+            file=sys.stderr,
+        )
+
+        return count
+
+
+def main(args=None):
+    """
+    Batch execution method.
+
+    Args:
+        args: optional list of command line arguments
+    """
+
+    # Command line parser
+    parser = argparse.ArgumentParser(description="codequestion batch search")
+    parser.add_argument(
+        "-i", "--input", help="file with one query per line, defaults to stdin"
+    )
+    parser.add_argument("-o", "--output", help="JSONL output file, defaults to stdout")
+    parser.add_argument(
+        "-l", "--limit", type=int, default=1, help="number of results per query"
+    )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        type=int,
+        default=64,
+        help="number of queries encoded per batch",
+    )
+
+    # Parse command line arguments
+    args = parser.parse_args(args)
+
+    batch = Batch()
+
+    with contextlib.ExitStack() as stack:
+        queries = (
+            stack.enter_context(open(args.input, encoding="utf-8"))
+            if args.input
+            else sys.stdin
+        )
+        output = (
+            stack.enter_context(open(args.output, "w", encoding="utf-8"))
+            if args.output
+            else sys.stdout
+        )
+
+        batch(queries, output, args.limit, args.batch)
+
+
+if __name__ == "__main__":
+    main()
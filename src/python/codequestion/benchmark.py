@@ -0,0 +1,447 @@
+"""
+Benchmark module
+"""
+
+import argparse
+import json
+import os
+import os.path
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from importlib.metadata import version
+
+from txtai.ann import ANNFactory
+from txtai.embeddings import Embeddings
+
+from .etl.stackexchange.db2qa import DB2QA
+from .index import Index
+from .metrics import Metrics
+from .search import Search
+
+
+class Benchmark:
+    """
+    Measures indexing throughput, query latency, memory usage and index size for an index configuration. Results are
+    written to a JSON file that can be compared with a baseline from an earlier run.
+    """
+
+    # Index build stages
+    STAGES = ["stream", "tokenize", "build", "encode", "ann", "save"]
+
+    # Query latency percentiles
+    PERCENTILES = [50, 95, 99]
+
+    # Words used to generate synthetic questions
+    WORDS = (
+        "python java sqlite query index array string list dict file parse error install linux windows server "
+        "network socket thread process memory cache vector model train test data table column join select update "
+        "delete insert function class method module package import build compile debug log config path shell script"
+    ).split()
+
+    # Tags used to generate synthetic questions
+    TAGS = ["python", "sql", "linux", "java", "networking", "machine-learning"]
+
+    def __init__(self, seed=1024):
+        """
+        Creates a new Benchmark instance.
+
+        Args:
+            seed: random seed used to generate synthetic data and select queries
+        """
+
+        self.seed = seed
+
+    def __call__(self, config, dbfile, queries=100, limit=1):
+        """
+        Runs the benchmark.
+
+        Args:
+            config: input configuration file
+            dbfile: input SQLite file
+            queries: number of queries to run
+            limit: maximum number of results per query
+
+        Returns:
+            dict of results
+        """
+
+        with tempfile.TemporaryDirectory() as home:
+            # Build and save index to a temporary codequestion home directory
+            stages, embeddings = self.build(
+                config, dbfile, os.path.join(home, "models", "stackexchange")
+            )
+
+            results = {
+                "config": config,
+                "rows": embeddings.count(),
+                "versions": {
+                    "python": platform.python_version(),
+                    "txtai": version("txtai"),
+                },
+                "stages": stages,
+                "query": self.query(home, self.questions(dbfile, queries), limit),
+                "size": self.size(os.path.join(home, "models", "stackexchange")),
+            }
+
+        # Peak resident set size, None if not available on this platform
+        results["memory"] = Metrics.rss()
+
+        return results
+
+    def build(self, config, dbfile, path):
+        """
+        Builds an index and times each stage. The stream, tokenize, encode and ann stages are measured separately
+        to break down the end-to-end build stage.
+
+        Args:
+            config: input configuration file
+            dbfile: input SQLite file
+            path: output index path
+
+        Returns:
+            ({stage: {seconds, rows/sec}}, embeddings)
+        """
+
+        index, stages = Index(), {}
+
+        # Read and transform rows
+        start = time.perf_counter()
+        documents = list(index.stream(dbfile, Embeddings(), "Streaming rows"))
+        stages["stream"] = self.stage(start, len(documents))
+
+        # Full index build
+        start = time.perf_counter()
+        embeddings = index.build(config, dbfile)
+        stages["build"] = self.stage(start, len(documents))
+
+        # Tokenize text, only run for word vector models
+        if embeddings.isweighted():
+            start = time.perf_counter()
+            rows = list(index.tokenize((dict(row) for _, row, _ in documents), None))
+            stages["tokenize"] = self.stage(start, len(rows))
+
+            documents = [(row["id"], row, row["tags"]) for row in rows]
+
+        # Encode text into vectors
+        start = time.perf_counter()
+        vectors = embeddings.batchtransform(
+            (uid, row["text"], tags) for uid, row, tags in documents
+        )
+        stages["encode"] = self.stage(start, len(documents))
+
+        # Build approximate nearest neighbor index
+        start = time.perf_counter()
+        ann = ANNFactory.create(embeddings.config)
+        ann.index(vectors)
+        stages["ann"] = self.stage(start, len(documents))
+
+        # Save index
+        start = time.perf_counter()
+        embeddings.save(path)
+        stages["save"] = self.stage(start, len(documents))
+
+        # Order stages
+        stages = {stage: stages[stage] for stage in Benchmark.STAGES if stage in stages}
+
+        return stages, embeddings
+
+    def stage(self, start, rows):
+        """
+        Builds stage timing results.
+
+        Args:
+            start: stage start time
+            rows: number of rows processed
+
+        Returns:
+            {seconds, rows/sec}
+        """
+
+        seconds = time.perf_counter() - start
+        return {"seconds": seconds, "rows/sec": rows / seconds if seconds else 0.0}
+
+    def questions(self, dbfile, count):
+        """
+        Selects a random sample of questions to use as queries.
+
+        Args:
+            dbfile: input SQLite file
+            count: number of questions
+
+        Returns:
+            list of questions
+        """
+
+        db = sqlite3.connect(dbfile)
+        questions = [
+            row[0] for row in db.execute("SELECT Question FROM questions ORDER BY Id")
+        ]
+        db.close()
+
+        return random.Random(self.seed).choices(questions, k=count) if questions else []
+
+    def query(self, home, queries, limit):
+        """
+        Loads a Search instance for a saved index and measures query latency.
+
+        Args:
+            home: codequestion home directory
+            queries: list of queries
+            limit: maximum number of results per query
+
+        Returns:
+            dict of query results, latencies are in milliseconds
+        """
+
+        # Load search instance from the benchmark home directory
+        current = os.environ.get("CODEQUESTION_HOME")
+        os.environ["CODEQUESTION_HOME"] = home
+
+        try:
+            start = time.perf_counter()
+            search = Search(cachesize=0, verbose=False)
+            load = time.perf_counter() - start
+        finally:
+            if current is None:
+                del os.environ["CODEQUESTION_HOME"]
+            else:
+                os.environ["CODEQUESTION_HOME"] = current
+
+        # Warm up
+        for query in queries[:10]:
+            search.search(query, limit)
+
+        # Single query latency
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            search.search(query, limit)
+            latencies.append(time.perf_counter() - start)
+
+        # Batch query throughput
+        start = time.perf_counter()
+        search.batch(queries, limit)
+        seconds = time.perf_counter() - start
+
+        latencies = sorted(latencies)
+        results = {"queries": len(queries), "load": load}
+        for p in Benchmark.PERCENTILES:
+            results[f"p{p}"] = (
+                latencies[min(len(latencies) * p // 100, len(latencies) - 1)] * 1000
+                if latencies
+                else 0.0
+            )
+
+        results["queries/sec"] = len(queries) / seconds if seconds else 0.0
+
+        return results
+
+    def size(self, path):
+        """
+        Calculates the size of all files in a directory.
+
+        Args:
+            path: directory path
+
+        Returns:
+            size in bytes
+        """
+
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, files in os.walk(path)
+            for name in files
+        )
+
+    def synthetic(self, dbfile, rows):
+        """
+        Generates a questions.db file with random questions.
+
+        Args:
+            dbfile: output SQLite file
+            rows: number of rows
+        """
+
+        generator = random.Random(self.seed)
+
+        def text(size):
+            return " ".join(generator.choices(Benchmark.WORDS, k=size))
+
+        if os.path.exists(dbfile):
+            os.remove(dbfile)
+
+        db = sqlite3.connect(dbfile)
+        DB2QA().create(db, DB2QA.QUESTIONS, "questions")
+
+        columns = list(DB2QA.QUESTIONS)
+        db.executemany(
+            DB2QA.INSERT_ROW.format(
+                table="questions",
+                columns=", ".join(columns),
+                values=", ".join(["?"] * len(columns)),
+            ),
+            (
+                (
+                    x,
+                    "synthetic",
+                    x,
+                    "2024-01-01 00:00:00",
+                    " ".join(generator.sample(Benchmark.TAGS, 2)),
+                    text(generator.randint(5, 15)).capitalize() + "?",
+                    "user",
+                    f"<p>{text(generator.randint(20, 60))}</p>",
+                    "user",
+                    f"https://example.com/questions/{x}",
+                    None,
+                )
+                for x in range(rows)
+            ),
+        )
+
+        db.commit()
+        db.close()
+
+    def compare(self, results, baseline):
+        """
+        Prints results alongside a baseline.
+
+        Args:
+            results: benchmark results
+            baseline: baseline results
+        """
+
+        print(f"{'metric':<24} {'baseline':>12} {'current':>12} {'change':>8}")
+        for name, current, previous in self.metrics(results, baseline):
+            change = (
+                f"{(current - previous) / previous * 100:+7.1f}%" if previous else ""
+            )
+            print(f"{name:<24} {previous:12.2f} {current:12.2f} {change:>8}")
+
+    def metrics(self, results, baseline):
+        """
+        Gets metrics found in both results and baseline.
+
+        Args:
+            results: benchmark results
+            baseline: baseline results
+
+        Returns:
+            list of (name, current value, baseline value)
+        """
+
+        metrics = []
+        for stage in Benchmark.STAGES:
+            if stage in results["stages"] and stage in baseline["stages"]:
+                metrics.append(
+                    (
+                        f"{stage} rows/sec",
+                        results["stages"][stage]["rows/sec"],
+                        baseline["stages"][stage]["rows/sec"],
+                    )
+                )
+
+        for name in [f"p{p}" for p in Benchmark.PERCENTILES] + ["queries/sec"]:
+            metrics.append(
+                (f"query {name}", results["query"][name], baseline["query"][name])
+            )
+
+        if results["memory"] is not None and baseline["memory"] is not None:
+            metrics.append(
+                (
+                    "memory MB",
+                    results["memory"] / 1024**2,
+                    baseline["memory"] / 1024**2,
+                )
+            )
+        metrics.append(
+            ("size MB", results["size"] / 1024**2, baseline["size"] / 1024**2)
+        )
+
+        return metrics
+
+
+if __name__ == "__main__":
+    # Command line parser
+    parser = argparse.ArgumentParser(description="Indexing and search benchmark")
+    parser.add_argument(
+        "config", help="path to index configuration file", metavar="CONFIG"
+    )
+    parser.add_argument(
+        "dbfile",
+        nargs="?",
+        help="path to questions.db file, a synthetic file is generated if not provided",
+        metavar="DBFILE",
+    )
+    parser.add_argument(
+        "-s",
+        "--synthetic",
+        type=int,
+        default=10000,
+        help="number of rows to generate when dbfile isn't provided",
+        metavar="ROWS",
+    )
+    parser.add_argument(
+        "-q",
+        "--queries",
+        type=int,
+        default=100,
+        help="number of queries to run",
+        metavar="QUERIES",
+    )
+    parser.add_argument(
+        "-l",
+        "--limit",
+        type=int,
+        default=1,
+        help="maximum number of results per query",
+        metavar="LIMIT",
+    )
+    parser.add_argument(
+        "-o", "--output", help="write JSON results to this file", metavar="OUTPUT"
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        help="compare results with a baseline JSON file",
+        metavar="BASELINE",
+    )
+
+    # Parse command line arguments
+    args = parser.parse_args()
+
+    # Path to index configuration file
+    if not os.path.exists(args.config):
+        print("Path to index configuration file does not exist, exiting")
+        sys.exit()
+
+    benchmark = Benchmark()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Generate synthetic questions.db file, if necessary
+        path = args.dbfile
+        if not path:
+            path = os.path.join(directory, "questions.db")
+            print(f"Generating {args.synthetic} synthetic rows")
+            benchmark.synthetic(path, args.synthetic)
+
+        # Run benchmark
+        output = benchmark(args.config, path, args.queries, args.limit)
+        output["dbfile"] = args.dbfile if args.dbfile else f"synthetic:{args.synthetic}"
+
+    # Print results
+    print(json.dumps(output, indent=2))
+
+    # Compare with baseline
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            benchmark.compare(output, json.load(f))
+
+    # Write JSON results
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
@@ -0,0 +1,173 @@
+"""
+Cache module
+"""
+
+import hashlib
+import os
+import os.path
+import pickle
+import threading
+
+from collections import OrderedDict
+
+
+class Cache:
+    """
+    Least recently used (LRU) query result cache. Optionally persisted to disk between sessions. The cache is thread-safe,
+    it's shared across request threads when running the server.
+    """
+
+    def __init__(self, size=1024, path=None, fingerprint=None):
+        """
+        Creates a new cache.
+
+        Args:
+            size: maximum number of cached entries, 0 disables caching
+            path: optional file path used to persist the cache
+            fingerprint: model fingerprint, persisted entries are discarded when it doesn't match
+        """
+
+        self.size = size
+        self.path = path
+        self.fingerprint = fingerprint
+
+        # Cached entries, ordered from least to most recently used
+        self.data = OrderedDict()
+
+        # Guards entries and statistics
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.hits, self.misses = 0, 0
+
+        # Load persisted entries
+        if self.path and os.path.exists(self.path):
+            self.load()
+
+    @staticmethod
+    def key(query, limit, tokens=None):
+        """
+        Builds a cache key. Queries are normalized to lowercase with collapsed whitespace. Token lists are used
+        instead of the query when provided.
+
+        Args:
+            query: query string
+            limit: maximum number of results
+            tokens: optional list of query tokens
+
+        Returns:
+            cache key
+        """
+
+        return (
+            tuple(tokens) if tokens is not None else " ".join(query.lower().split()),
+            limit,
+        )
+
+    @staticmethod
+    def directory(path):
+        """
+        Builds a fingerprint for a model directory from the name, size and modification time of each file.
+
+        Args:
+            path: model directory
+
+        Returns:
+            fingerprint
+        """
+
+        files = []
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                stat = os.stat(os.path.join(path, name))
+                files.append((name, stat.st_size, stat.st_mtime_ns))
+
+        return hashlib.sha256(repr((path, files)).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Gets a cached value and marks it as most recently used.
+
+        Args:
+            key: cache key
+
+        Returns:
+            cached value if found, None otherwise
+        """
+
+        with self.lock:
+            if key in self.data:
+                self.hits += 1
+                self.data.move_to_end(key)
+                return self.data[key]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """
+        Adds a value to the cache. Evicts the least recently used entry when the cache is full.
+
+        Args:
+            key: cache key
+            value: value to cache
+        """
+
+        if self.size > 0:
+            with self.lock:
+                self.data[key] = value
+                self.data.move_to_end(key)
+
+                while len(self.data) > self.size:
+                    self.data.popitem(last=False)
+
+    def clear(self):
+        """
+        Clears all cached entries and statistics.
+        """
+
+        with self.lock:
+            self.data.clear()
+            self.hits, self.misses = 0, 0
+
+    def stats(self):
+        """
+        Gets cache statistics.
+
+        Returns:
+            dict with size, hits and misses
+        """
+
+        with self.lock:
+            return {"size": len(self.data), "hits": self.hits, "misses": self.misses}
+
+    def load(self):
+        """
+        Loads persisted entries. Entries saved for a different model fingerprint are discarded.
+        """
+
+        # pylint: disable=W0703
+        try:
+            with open(self.path, "rb") as handle:
+                fingerprint, data = pickle.load(handle)
+
+            if fingerprint == self.fingerprint:
+                self.data = OrderedDict(data[-self.size :] if self.size > 0 else [])
+        except Exception as e:
+            print(f"WARNING: unable to load query cache from {self.path}: {e}")
+
+    def save(self):
+        """
+        Persists entries to disk, if a cache path is set.
+        """
+
+        if self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            with self.lock:
+                data = list(self.data.items())
+
+            with open(self.path, "wb") as handle:
+                pickle.dump((self.fingerprint, data), handle)
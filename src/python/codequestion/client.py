@@ -0,0 +1,91 @@
+"""
+Client module
+"""
+
+import argparse
+import os
+import sys
+
+from urllib.error import URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+
+class Client:
+    """
+    Thin client for a running codequestion server.
+    """
+
+    # Default server url
+    URL = "http://127.0.0.1:8010"
+
+    def __init__(self, url=None):
+        """
+        Creates a new client.
+
+        Args:
+            url: server url, defaults to the CODEQUESTION_SERVER environment variable or Client.URL
+        """
+
+        url = url if url else os.environ.get("CODEQUESTION_SERVER")
+        self.url = (url if url else Client.URL).rstrip("/")
+
+    def __call__(self, query, limit=1):
+        """
+        Runs a search query or console command (.show, .topics, .path) on the server.
+
+        Args:
+            query: search query or console command
+            limit: number of results to return
+
+        Returns:
+            command output
+        """
+
+        params = urlencode({"query": query, "limit": limit})
+        with urlopen(f"{self.url}/search?{params}") as response:
+            return response.read().decode("utf-8")
+
+    def available(self):
+        """
+        Checks if a server is running.
+
+        Returns:
+            True if a server is available, False otherwise
+        """
+
+        try:
+            with urlopen(f"{self.url}/health", timeout=0.5) as response:
+                return response.status == 200
+        except (URLError, OSError):
+            return False
+
+
+def main():
+    """
+    Runs a single query on a running server. The codequestion console runs single queries without a server.
+    """
+
+    # Command line parser
+    parser = argparse.ArgumentParser(description="codequestion client")
+    parser.add_argument("query", nargs="+", help="search query or console command")
+    parser.add_argument(
+        "-l", "--limit", type=int, default=1, help="number of results to return"
+    )
+
+    # Parse command line arguments
+    args = parser.parse_args()
+    query = " ".join(args.query)
+
+    client = Client()
+    if not client.available():
+        print(
+            f'No codequestion server running at {client.url}, run codequestion "{query}" to search without a server'
+        )
+        sys.exit(1)
+
+    print(client(query, args.limit), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,21 @@
 Console module
 """
 
+import argparse
+import os.path
+import sys
+import threading
+import time
+
 from cmd import Cmd
 
 from rich.console import Console as RichConsole
 
-from .path import Path
-from .search import Search
-from .topics import Topics
+from .client import Client
+from .models import Models
+
+# Module load time, used to profile startup
+START = time.perf_counter()
 
 
 class Console(Cmd):
@@ -16,9 +24,14 @@ class Console(Cmd):
     codequestion console.
     """
 
-    def __init__(self):
+    def __init__(self, client=None, profile=False, mmap=False):
         """
         Creates a new codequestion console.
+
+        Args:
+            client: optional client, commands are run on a codequestion server when set
+            profile: if True, import and load timings are collected
+            mmap: if True, the index is memory-mapped read-only
         """
 
         super().__init__()
@@ -39,22 +52,112 @@ class Console(Cmd):
         # Path traversal action
         self.path = None
 
+        # Server client
+        self.client = client
+
+        # Background index loading
+        self.mmap = mmap
+        self.loader = None
+        self.error = None
+
+        # Startup timings
+        self.profile = profile
+        self.timings = {}
+
     def preloop(self):
         """
-        Loads initial configuration.
+        Loads initial configuration. The embeddings index is loaded in a background thread, so the prompt is
+        shown immediately.
+        """
+
+        # Server loads index, nothing to load
+        if self.client:
+            return
+
+        path = Models.modelPath("stackexchange")
+        if os.path.isfile(os.path.join(path, "config")):
+            print(f"Loading model from {path}")
+
+        self.loader = threading.Thread(target=self.load, daemon=True)
+        self.loader.start()
+
+    def load(self):
+        """
+        Loads query and embeddings. Errors are stored and raised when the index is first used.
         """
 
-        # Load query and embeddings
-        self.search = Search()
-        self.embeddings = self.search.embeddings
+        # pylint: disable=W0703
+        try:
+            start = time.perf_counter()
+
+            # pylint: disable=C0415
+            from .search import Search
+
+            self.timing("import search modules", start)
+
+            # Load query and embeddings
+            start = time.perf_counter()
+            search = Search(verbose=False, mmap=self.mmap)
+            self.timing("load embeddings index", start)
+
+            self.search, self.embeddings = search, search.embeddings
+        except Exception as e:
+            self.error = e
+
+    def wait(self):
+        """
+        Waits for the background index load to complete.
+        """
+
+        if self.loader:
+            if self.loader.is_alive():
+                print("Waiting for model to load...")
+                self.loader.join()
+
+            self.loader = None
+
+        if self.error:
+            raise self.error
+
+    def actions(self):
+        """
+        Creates graph-based actions on first use.
+        """
+
+        # pylint: disable=C0415
+        if self.embeddings.graph and not self.path:
+            start = time.perf_counter()
+
+            from .path import Path
+            from .topics import Topics
 
-        # Load graph-based actions, if necessary
-        if self.embeddings.graph:
             if self.embeddings.graph.topics:
                 self.topics = Topics(self.embeddings)
 
             self.path = Path(self.embeddings)
 
+            self.timing("load graph actions", start)
+
+    def timing(self, name, start):
+        """
+        Stores a startup timing, if profiling is enabled.
+
+        Args:
+            name: timing name
+            start: start time
+        """
+
+        if self.profile:
+            self.timings[name] = time.perf_counter() - start
+
+    def postloop(self):
+        """
+        Saves the query result cache, if persistence is enabled.
+        """
+
+        if self.search:
+            self.search.cache.save()
+
     def default(self, line):
         """
         Default event loop.
@@ -69,22 +172,75 @@ class Console(Cmd):
             if command.startswith(".limit"):
                 command = self.split(line)
                 self.limit = int(command[1])
-            elif command.startswith(".path") and self.path:
-                command = self.split(line)
-                start, end = command[1].split()
-                self.path(int(start), int(end))
-            elif command.startswith(".show"):
-                command = self.split(line)
-                self.search(uid=command[1])
-            elif command.startswith(".topics") and self.topics:
-                command = self.split(line)
-                self.topics(command[1] if len(command) > 1 else None)
+            elif self.client:
+                # Run command on server
+                print(self.client(line, self.limit), end="")
             else:
-                # Search is default action
-                self.search(line, self.limit)
+                # Wait for index to load
+                self.wait()
+                self.run(line, command)
         except Exception:
             self.console.print_exception()
 
+    def run(self, line, command):
+        """
+        Runs a command against the loaded index.
+
+        Args:
+            line: command line
+            command: lower case command line
+        """
+
+        if command.startswith((".path", ".topics")):
+            self.actions()
+
+        if command.startswith(".cache"):
+            stats = self.search.cache.stats()
+            self.console.print(
+                f"Cache size: {stats['size']}, hits: {stats['hits']}, misses: {stats['misses']}"
+            )
+        elif command.startswith(".path") and self.path:
+            command = self.split(line)
+            start, end = command[1].split()
+            self.path(int(start), int(end))
+        elif command.startswith(".show"):
+            command = self.split(line)
+            self.search(uid=command[1])
+        elif command.startswith(".topics") and self.topics:
+            command = self.split(line)
+            self.topics(command[1] if len(command) > 1 else None)
+        else:
+            # Search is default action
+            self.search(line, self.limit)
+
+    def do_EOF(self, arg):
+        """
+        Exits the console on end of input (Ctrl-D).
+
+        Args:
+            arg: unused
+
+        Returns:
+            True to stop the event loop
+        """
+
+        print()
+        return self.do_quit(arg)
+
+    # pylint: disable=W0613
+    def do_quit(self, arg):
+        """
+        Exits the console.
+
+        Args:
+            arg: unused
+
+        Returns:
+            True to stop the event loop
+        """
+
+        return True
+
     def do_help(self, arg):
         """
         Shows a help message.
@@ -94,10 +250,12 @@ class Console(Cmd):
         """
 
         commands = {
+            ".cache": "\t\t\tshow query result cache statistics",
             ".limit": "(number)\t\tset the maximum number of query rows to return",
             ".path": "(start) (end)\tprints a semantic path between questions",
             ".show": "(id)\t\tprint question with specified id",
             ".topics": "(query)\t\tshows topics best matching query. if query is empty, top topics are shown",
+            "quit": "\t\t\texit the console",
         }
 
         if arg in commands:
@@ -129,7 +287,79 @@ def main():
     Console execution loop.
     """
 
-    Console().cmdloop()
+    # Run batch command
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        # pylint: disable=C0415
+        from .batch import main as batch
+
+        batch(sys.argv[2:])
+        return
+
+    # Command line parser
+    parser = argparse.ArgumentParser(description="codequestion console")
+    parser.add_argument(
+        "query",
+        nargs="*",
+        help="optional search query or console command, runs a single query and exits",
+    )
+    parser.add_argument(
+        "-l", "--limit", type=int, default=1, help="number of results to return"
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="load the index read-only with memory-mapped index files",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print an import and load timing breakdown, then exit",
+    )
+
+    # Parse command line arguments
+    args = parser.parse_args()
+
+    # Use a running server, if available
+    client = Client()
+    console = Console(
+        client if client.available() else None, args.profile_startup, args.mmap
+    )
+
+    if args.profile_startup:
+        profile(console)
+    elif args.query:
+        # Run a single query
+        console.preloop()
+        console.limit = args.limit
+        console.default(" ".join(args.query))
+    else:
+        # Interrupts skip postloop, save the query result cache before exiting
+        try:
+            console.cmdloop()
+        except KeyboardInterrupt:
+            print()
+            console.postloop()
+
+
+def profile(console):
+    """
+    Runs console startup and prints a timing breakdown.
+
+    Args:
+        console: Console instance
+    """
+
+    console.preloop()
+    console.timings["prompt ready"] = time.perf_counter() - START
+
+    if not console.client:
+        console.wait()
+        console.actions()
+
+    console.timings["total"] = time.perf_counter() - START
+
+    for name, elapsed in console.timings.items():
+        print(f"{name:<25} {elapsed:8.3f}s")
 
 
 if __name__ == "__main__":
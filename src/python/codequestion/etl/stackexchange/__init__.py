@@ -5,5 +5,6 @@ Stack Exchange imports
 from .db2qa import DB2QA
 from .decompress import Decompress
 from .execute import Execute
+from .filters import Filters
 from .sift import Sift
 from .xml2db import XML2DB
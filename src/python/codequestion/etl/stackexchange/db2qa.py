@@ -6,6 +6,9 @@ import os
 import re
 import sqlite3
 
+from ...answer import Answer
+from ...metrics import Metrics
+
 
 class DB2QA:
     """
@@ -25,6 +28,7 @@ class DB2QA:
         "Answer": "TEXT",
         "AnswerUser": "TEXT",
         "Reference": "TEXT",
+        "Markdown": "TEXT",
     }
 
     # List of sources
@@ -54,26 +58,100 @@ class DB2QA:
         "wordpress": "https://wordpress.stackexchange.com",
     }
 
+    # Changes schema
+    CHANGES = {"Id": "INTEGER PRIMARY KEY", "Action": "TEXT"}
+
     # SQL statements
     CREATE_TABLE = "CREATE TABLE IF NOT EXISTS {table} ({fields})"
     INSERT_ROW = "INSERT INTO {table} ({columns}) VALUES ({values})"
-    CREATE_SOURCE_INDEX = "CREATE INDEX source ON questions(Source, SourceId)"
-    CREATE_TEXT_INDEX = "CREATE VIRTUAL TABLE search USING fts5(Id, Question, Tags)"
+    ATTACH_SOURCE = "ATTACH DATABASE ? AS source"
+    DETACH_SOURCE = "DETACH DATABASE source"
+    SELECT_SOURCE = (
+        "SELECT q.Id, q.AcceptedAnswerId, q.OwnerUserId, q.OwnerDisplayName, q.LastActivityDate, q.Title, q.Tags, "
+        "a.Body, a.OwnerUserId, a.OwnerDisplayName "
+        "FROM source.questions q INNER JOIN source.answers a ON a.Id = q.AcceptedAnswerId "
+        "WHERE a.Body IS NOT NULL AND a.Body <> '' ORDER BY q.Id"
+    )
+    CREATE_SOURCE_INDEX = (
+        "CREATE INDEX IF NOT EXISTS source ON questions(Source, SourceId)"
+    )
+    CREATE_TEXT_INDEX = (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(Id, Question, Tags)"
+    )
+    DELETE_TEXT_ROWS = "DELETE FROM search"
     INSERT_TEXT_ROWS = "INSERT INTO search SELECT Id, Question, Tags from questions"
 
-    def __call__(self, databases, qafile):
+    # Incremental update SQL statements
+    MAX_ID = "SELECT coalesce(max(Id), -1) + 1 FROM questions"
+    CREATE_STAGING_INDEX = (
+        "CREATE INDEX IF NOT EXISTS temp.stagingsource ON staging(SourceId)"
+    )
+    FIND_DELETES = (
+        "INSERT INTO changes SELECT Id, 'delete' FROM questions q WHERE q.Source = ? "
+        "AND NOT EXISTS (SELECT 1 FROM temp.staging s WHERE s.SourceId = q.SourceId)"
+    )
+    FIND_UPDATES = (
+        "INSERT INTO changes SELECT q.Id, 'update' FROM questions q INNER JOIN temp.staging s ON s.SourceId = q.SourceId "
+        "WHERE q.Source = ? AND (q.Date IS NOT s.Date OR q.Tags IS NOT s.Tags OR q.Question IS NOT s.Question OR q.Answer IS NOT s.Answer "
+        "OR (q.Markdown IS NOT NULL AND s.Markdown IS NOT NULL AND q.Markdown <> s.Markdown))"
+    )
+    FILL_MARKDOWN = (
+        "UPDATE questions SET Markdown = (SELECT s.Markdown FROM temp.staging s WHERE s.SourceId = questions.SourceId) "
+        "WHERE Source = ? AND Markdown IS NULL"
+    )
+    DELETE_ROWS = "DELETE FROM questions WHERE Source = ? AND Id IN (SELECT Id FROM changes WHERE Action = 'delete')"
+    UPDATE_ROWS = (
+        "UPDATE questions SET (Date, Tags, Question, QuestionUser, Answer, AnswerUser, Reference, Markdown) = "
+        "(SELECT Date, Tags, Question, QuestionUser, Answer, AnswerUser, Reference, Markdown FROM temp.staging s "
+        "WHERE s.SourceId = questions.SourceId) "
+        "WHERE Source = ? AND Id IN (SELECT Id FROM changes WHERE Action = 'update')"
+    )
+    INSERT_ROWS = (
+        "INSERT INTO questions SELECT ? + row_number() OVER (ORDER BY s.Id) - 1, s.Source, s.SourceId, s.Date, s.Tags, s.Question, "
+        "s.QuestionUser, s.Answer, s.AnswerUser, s.Reference, s.Markdown FROM temp.staging s "
+        "WHERE NOT EXISTS (SELECT 1 FROM questions q WHERE q.Source = s.Source AND q.SourceId = s.SourceId)"
+    )
+    FIND_INSERTS = (
+        "INSERT INTO changes SELECT Id, 'insert' FROM questions WHERE Id >= ?"
+    )
+    COUNT_CHANGES = "SELECT Action, count(*) FROM changes GROUP BY Action"
+    TABLE_INFO = "PRAGMA table_info(questions)"
+    ADD_MARKDOWN = "ALTER TABLE questions ADD COLUMN Markdown TEXT"
+
+    def __init__(self, batch=10000, markdown=False):
+        """
+        Creates a new DB2QA instance.
+
+        Args:
+            batch: number of rows to read and insert at a time
+            markdown: if True, answers are also converted to markdown and stored in the Markdown column
+        """
+
+        self.batch = batch
+        self.markdown = markdown
+
+    def __call__(self, databases, qafile, incremental=False):
         """
         Executes a run to convert a list of databases to a single consolidated questions db file.
 
+        When incremental is True and qafile exists, questions are upserted by (Source, SourceId) instead of rebuilding
+        the file. Ids of new, updated and removed questions are stored in the changes table of the output database.
+        When incremental is True and qafile doesn't exist, the file is built in full and all rows are stored as inserts.
+
         Args:
             databases: paths to input databases
             qafile: output database path
+            incremental: if True, updates an existing output database in place
         """
 
         print(f"Converting {databases} to {qafile}")
 
+        # Only run an incremental update when there is an existing file, otherwise track a full build as inserts
+        tracked = incremental
+        incremental = incremental and os.path.exists(qafile)
+
         # Delete existing file
-        if os.path.exists(qafile):
+        if not incremental and os.path.exists(qafile):
             os.remove(qafile)
 
         # Create output database
@@ -82,8 +160,24 @@ class DB2QA:
         # Create questions table
         self.create(qa, DB2QA.QUESTIONS, "questions")
 
-        # Row index
-        index = 0
+        if incremental:
+            # Add Markdown column to databases built before it was added
+            if "Markdown" not in [row[1] for row in qa.execute(DB2QA.TABLE_INFO)]:
+                qa.execute(DB2QA.ADD_MARKDOWN)
+
+            # Create changes and staging tables
+            self.create(qa, DB2QA.CHANGES, "changes")
+            self.create(qa, DB2QA.QUESTIONS, "temp.staging")
+            qa.execute(DB2QA.CREATE_STAGING_INDEX)
+
+            # Clear changes from previous run
+            qa.execute("DELETE FROM changes")
+
+            # Next row index
+            index = qa.execute(DB2QA.MAX_ID).fetchone()[0]
+        else:
+            # Row index
+            index = 0
 
         for dbfile in databases:
             print("Processing " + dbfile)
@@ -91,114 +185,170 @@ class DB2QA:
             # Create source name
             source = os.path.splitext(os.path.basename(dbfile))[0].lower()
 
-            # Input database
-            db = sqlite3.connect(dbfile)
-            cur = db.cursor()
-
-            cur.execute(
-                "SELECT Id, AcceptedAnswerId, OwnerUserId, OwnerDisplayName, LastActivityDate, Title, Tags FROM questions"
+            with Metrics.timer("db2qa.load"):
+                if incremental:
+                    # Load source into staging table and merge changes
+                    qa.execute("DELETE FROM temp.staging")
+                    self.load(qa, dbfile, source, "temp.staging", 0)
+                    index = self.merge(qa, source, index)
+                else:
+                    # Load source directly into questions table
+                    index = self.load(qa, dbfile, source, "questions", index)
+
+        if incremental:
+            # Print change summary
+            changes = dict(qa.execute(DB2QA.COUNT_CHANGES).fetchall())
+            for action, count in changes.items():
+                Metrics.count(f"db2qa.{action}", count)
+
+            print(
+                f"Total rows inserted: {changes.get('insert', 0)}, "
+                f"updated: {changes.get('update', 0)}, deleted: {changes.get('delete', 0)}"
             )
+        else:
+            print(f"Total rows inserted: {index}")
 
-            # Need to select all rows to allow execution of insert statements
-            for question in cur.fetchall():
-                # Find accepted answer
-                answer = self.find(question, cur)
-                if answer:
-                    # Combine into single question row
-                    self.insert(qa, index, source, question, answer)
-
-                    index += 1
-                    if index % 10000 == 0:
-                        print(f"Inserted {index} rows")
-
-            db.close()
-
-        print(f"Total rows inserted: {index}")
+            # Store all rows as inserts, so an incremental index update can run after the first build
+            if tracked:
+                self.create(qa, DB2QA.CHANGES, "changes")
+                qa.execute(DB2QA.FIND_INSERTS, [0])
 
         # Create indices
-        for statement in [
-            DB2QA.CREATE_SOURCE_INDEX,
-            DB2QA.CREATE_TEXT_INDEX,
-            DB2QA.INSERT_TEXT_ROWS,
-        ]:
-            qa.execute(statement)
-
-        # Commit changes and close
-        qa.commit()
+        with Metrics.timer("db2qa.index"):
+            for statement in [
+                DB2QA.CREATE_SOURCE_INDEX,
+                DB2QA.CREATE_TEXT_INDEX,
+                DB2QA.DELETE_TEXT_ROWS,
+                DB2QA.INSERT_TEXT_ROWS,
+            ]:
+                qa.execute(statement)
+
+            # Commit changes
+            qa.commit()
+
+        # Close database
         qa.close()
 
-    def create(self, db, table, name):
+    def load(self, qa, dbfile, source, table, index):
         """
-        Creates a SQLite table.
+        Joins questions and accepted answers in a staging database and inserts the combined rows into table.
 
         Args:
-            db: database connection
-            table: table schema
-            name: table name
+            qa: output database connection
+            dbfile: input database path
+            source: question source
+            table: output table name
+            index: starting row index
+
+        Returns:
+            next row index
         """
 
-        columns = [f"{name} {ctype}" for name, ctype in table.items()]
-        create = DB2QA.CREATE_TABLE.format(table=name, fields=", ".join(columns))
+        # Build insert prepared statement
+        columns = list(DB2QA.QUESTIONS)
+        insert = DB2QA.INSERT_ROW.format(
+            table=table,
+            columns=", ".join(columns),
+            values=("?, " * len(columns))[:-2],
+        )
 
-        # pylint: disable=W0703
-        try:
-            db.execute(create)
-        except Exception as e:
-            print(create)
-            print("Failed to create table: " + e)
+        # Attach input database
+        qa.execute(DB2QA.ATTACH_SOURCE, [dbfile])
+        start = index
+
+        # Join each question with its accepted answer in a single query
+        cur = qa.cursor()
+        cur.execute(DB2QA.SELECT_SOURCE)
+
+        # Stream joined rows in batches to keep memory usage flat
+        rows = cur.fetchmany(self.batch)
+        while rows:
+            batch = []
+            for row in rows:
+                # Combine into single question row
+                batch.append(
+                    self.values(
+                        DB2QA.QUESTIONS,
+                        self.build(index, source, row[:7], row[7:]),
+                        columns,
+                    )
+                )
+
+                index += 1
+                if index % 10000 == 0:
+                    print(f"Inserted {index} rows")
+
+            # Execute bulk insert
+            qa.executemany(insert, batch)
+            rows = cur.fetchmany(self.batch)
+
+        # Commit changes and detach input database
+        Metrics.count("db2qa.rows", index - start)
+        cur.close()
+        qa.commit()
+        qa.execute(DB2QA.DETACH_SOURCE)
 
-    def find(self, question, cur):
+        return index
+
+    def merge(self, qa, source, index):
         """
-        Finds a corresponding answer for the input question.
+        Merges the staging table for a source into the questions table. Questions are matched on (Source, SourceId).
+        Changed rows are updated in place, new rows are appended and rows missing from the staging table are deleted.
+
+        Markdown is only compared when both the existing row and the staging row have it, so switching the markdown
+        setting between runs doesn't mark every row as changed. When markdown is enabled, existing rows without
+        markdown are filled in without being marked as changed.
 
         Args:
-            question: input question row
-            cur: database cursor
+            qa: output database connection
+            source: question source
+            index: next row index
 
         Returns:
-            Answer row if found, None otherwise
+            next row index
         """
 
-        # Query for accepted answer
-        cur.execute(
-            "SELECT Body, OwnerUserId, OwnerDisplayName from answers where Id = ?",
-            [question[1]],
-        )
-        answer = cur.fetchone()
+        # Find and apply deletes and updates
+        for statement in [
+            DB2QA.FIND_DELETES,
+            DB2QA.FIND_UPDATES,
+            DB2QA.DELETE_ROWS,
+            DB2QA.UPDATE_ROWS,
+        ]:
+            qa.execute(statement, [source])
+
+        # Fill in markdown for rows stored without it
+        if self.markdown:
+            qa.execute(DB2QA.FILL_MARKDOWN, [source])
 
-        if answer and answer[0]:
-            # Check if answer has a message body
-            return answer
+        # Append new rows
+        inserted = qa.execute(DB2QA.INSERT_ROWS, [index]).rowcount
+        qa.execute(DB2QA.FIND_INSERTS, [index])
 
-        return None
+        # Commit changes
+        qa.commit()
 
-    def insert(self, db, index, source, question, answer):
+        return index + inserted
+
+    def create(self, db, table, name):
         """
-        Builds and inserts a consolidated question.
+        Creates a SQLite table.
 
         Args:
             db: database connection
-            index: row index
-            source: question source
-            question: question row
-            answer: answer row
+            table: table schema
+            name: table name
         """
 
-        table = DB2QA.QUESTIONS
-
-        # Build insert prepared statement
-        columns = [name for name, _ in table.items()]
-        insert = DB2QA.INSERT_ROW.format(
-            table="questions",
-            columns=", ".join(columns),
-            values=("?, " * len(columns))[:-2],
-        )
-
-        # Build row of insert values
-        row = self.build(index, source, question, answer)
+        columns = [f"{name} {ctype}" for name, ctype in table.items()]
+        create = DB2QA.CREATE_TABLE.format(table=name, fields=", ".join(columns))
 
-        # Execute insert statement
-        db.execute(insert, self.values(table, row, columns))
+        # pylint: disable=W0703
+        try:
+            db.execute(create)
+        except Exception as e:
+            print(create)
+            print("Failed to create table: " + e)
 
     def build(self, index, source, question, answer):
         """
@@ -224,7 +374,10 @@ class DB2QA:
         # Create URL reference
         reference = f"{DB2QA.SOURCES[source]}/questions/{question[0]}"
 
-        # Id, Source, SourceId, Date, Tags, Question, QuestionUser, Answer, AnswerUser, Reference
+        # Precompute answer markdown, if enabled
+        markdown = Answer.markdown(answer[0]) if self.markdown else None
+
+        # Id, Source, SourceId, Date, Tags, Question, QuestionUser, Answer, AnswerUser, Reference, Markdown
         return (
             index,
             source,
@@ -236,6 +389,7 @@ class DB2QA:
             answer[0],
             auser,
             reference,
+            markdown,
         )
 
     def values(self, table, row, columns):
@@ -6,6 +6,8 @@ import shlex
 import shutil
 import subprocess
 
+from ...metrics import Metrics
+
 
 class Decompress:
     """
@@ -20,16 +22,13 @@ class Decompress:
             path: input directory path with 7z files
         """
 
-        # Check for 7za, default to 7z
-        binary = "7za" if shutil.which("7za") else "7z"
-
         # Build command
         path = path.replace("\\", "/")
-        command = f"{binary} e {path}/*.7z Posts.xml -y -o{path}"
+        command = f"{self.binary()} e {path}/*.7z Posts.xml -y -o{path}"
         print(command)
 
         # Start command
-        with subprocess.Popen(
+        with Metrics.timer("decompress"), subprocess.Popen(
             shlex.split(command), stdout=subprocess.PIPE, universal_newlines=True
         ) as process:
             while True:
@@ -41,3 +40,38 @@ class Decompress:
 
             # Call final poll on completion
             process.poll()
+
+    def stream(self, path):
+        """
+        Runs the 7za extraction and streams Posts.xml from the 7za process stdout. Nothing is written to disk.
+        This method is a generator and will yield a line at a time.
+
+        Args:
+            path: input directory path with 7z files
+        """
+
+        # Build command
+        path = path.replace("\\", "/")
+        command = f"{self.binary()} x -so {path}/*.7z Posts.xml"
+        print(command)
+
+        # Start command
+        with subprocess.Popen(
+            shlex.split(command), stdout=subprocess.PIPE, encoding="utf-8"
+        ) as process:
+            yield from process.stdout
+
+            # Wait for process to complete and check for errors
+            if process.wait():
+                raise subprocess.CalledProcessError(process.returncode, command)
+
+    def binary(self):
+        """
+        Gets the 7zip binary to run.
+
+        Returns:
+            7za if available, otherwise 7z
+        """
+
+        # Check for 7za, default to 7z
+        return "7za" if shutil.which("7za") else "7z"
@@ -2,12 +2,19 @@
 Execute module
 """
 
+import argparse
+import glob
 import os
 import os.path
 import sys
+import time
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ...metrics import Metrics
 from .db2qa import DB2QA
 from .decompress import Decompress
+from .filters import Filters
 from .sift import Sift
 from .xml2db import XML2DB
 
@@ -44,70 +51,246 @@ class Execute:
         "wordpress",
     ]
 
-    def __call__(self, path):
+    def __init__(self, filters=None):
+        """
+        Creates a new Execute instance.
+
+        Args:
+            filters: optional filters configuration, see Filters. The sources setting limits the sources processed.
+        """
+
+        # Fail early on unknown sources
+        Filters.validate(filters)
+
+        self.filters = filters if filters else {}
+        self.sources = self.filters.get("sources", Execute.SOURCES)
+
+    def __call__(
+        self, path, workers=None, stream=False, incremental=False, markdown=False
+    ):
         """
         Converts a directory of raw sources to a single output questions database.
 
         Args:
             path: base directory path
+            workers: number of worker processes, sources are processed sequentially if None or 1
+            stream: if True, raw xml is streamed from 7za through sift into xml2db without writing xml files
+            incremental: if True, an existing questions database is updated in place and changes are tracked
+            markdown: if True, answers are precomputed as markdown
         """
 
         # Iterates through a directory of raw sources and builds staging databases
-        databases = self.process(path)
+        databases = self.process(path, workers, stream)
 
         # Output database file
         qafile = os.path.join(path, "questions.db")
 
         # Build consolidated SQLite questions database
-        db2qa = DB2QA()
-        db2qa(databases, qafile)
+        db2qa = DB2QA(markdown=markdown)
+        db2qa(databases, qafile, incremental)
 
-    def process(self, path):
+    def process(self, path, workers=None, stream=False):
         """
         Iterates through each source and converts raw xml to SQLite databases. Returns a list of
         output databases.
 
         Args:
             path: input directory path with raw source data directories
+            workers: number of worker processes, sources are processed sequentially if None or 1
+            stream: if True, raw xml is streamed from 7za through sift into xml2db without writing xml files
 
         Returns:
             paths to output databases
         """
 
-        # Extract filtered content and build source databases to process
-        for source in Execute.SOURCES:
-            spath = os.path.join(path, source)
+        if workers and workers > 1:
+            # Build source databases in parallel
+            self.parallel(path, workers, stream)
+        else:
+            # Extract filtered content and build source databases to process
+            for source in self.sources:
+                self.run(path, source, stream)
 
-            # Extract Posts.xml from 7za file
-            decompress = Decompress()
-            decompress(spath)
+        # Get list of all databases to consolidate
+        return [os.path.join(path, source, f"{source}.db") for source in self.sources]
+
+    def parallel(self, path, workers, stream):
+        """
+        Builds source databases using a pool of worker processes. Sources are scheduled largest first
+        to minimize the total run time.
+
+        Args:
+            path: input directory path with raw source data directories
+            workers: number of worker processes
+            stream: if True, raw xml is streamed from 7za through sift into xml2db without writing xml files
+        """
 
-            posts = os.path.join(spath, "Posts.xml")
-            filtered = os.path.join(spath, "Filtered.xml")
+        # Schedule largest sources first
+        sources = sorted(
+            self.sources, key=lambda source: self.size(path, source), reverse=True
+        )
 
-            # Filter Posts.xml file for matching questions
-            sift = Sift()
-            sift(posts, filtered)
+        print(f"Processing {len(sources)} sources with {workers} workers")
 
-            dbfile = os.path.join(spath, f"{source}.db")
+        failed = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(self.task, path, source, stream): source
+                for source in sources
+            }
 
-            # Convert filtered Posts.xml file to SQLite db file
-            xml2db = XML2DB()
-            xml2db(filtered, dbfile)
+            for count, future in enumerate(as_completed(futures)):
+                source = futures[future]
 
-        # Get list of all databases to consolidate
-        return [
-            os.path.join(path, source, f"{source}.db") for source in Execute.SOURCES
-        ]
+                # pylint: disable=W0703
+                try:
+                    data, elapsed = future.result()
+                    Metrics.merge(data)
+                    status = f"completed in {elapsed:.2f}s"
+                except Exception as e:
+                    failed[source] = e
+                    status = "FAILED"
+
+                print(f"[{count + 1}/{len(sources)}] {source} {status}")
+
+        # Report failures
+        if failed:
+            for source, e in failed.items():
+                print(f"ERROR: {source}: {type(e).__name__}: {e}")
+
+            raise RuntimeError(f"Failed to process sources: {', '.join(failed)}")
+
+    def task(self, path, source, stream):
+        """
+        Runs a single source in a worker process and collects the metrics for that source. Elapsed time is measured
+        in the worker, so it excludes time spent waiting in the pool queue.
+
+        Args:
+            path: input directory path with raw source data directories
+            source: source name
+            stream: if True, raw xml is streamed from 7za through sift into xml2db without writing xml files
+
+        Returns:
+            (source metrics, elapsed seconds)
+        """
+
+        start = time.time()
+
+        # Worker processes are reused across sources
+        Metrics.reset()
+        self.run(path, source, stream)
+
+        return Metrics.data(), time.time() - start
+
+    def run(self, path, source, stream=False):
+        """
+        Runs the decompress, sift and xml2db steps for a single source.
+
+        Args:
+            path: input directory path with raw source data directories
+            source: source name
+            stream: if True, raw xml is streamed from 7za through sift into xml2db without writing xml files
+
+        Returns:
+            path to output database
+        """
+
+        spath = os.path.join(path, source)
+        dbfile = os.path.join(spath, f"{source}.db")
+
+        if stream:
+            # Stream Posts.xml from 7za file, filter for matching questions and convert to SQLite db file
+            decompress, xml2db = Decompress(), XML2DB()
+            sift = Sift(filters=Filters(self.filters, source))
+            xml2db(sift.filter(decompress.stream(spath)), dbfile)
+
+            return dbfile
+
+        # Extract Posts.xml from 7za file
+        decompress = Decompress()
+        decompress(spath)
+
+        posts = os.path.join(spath, "Posts.xml")
+        filtered = os.path.join(spath, "Filtered.xml")
+
+        # Filter Posts.xml file for matching questions
+        sift = Sift(filters=Filters(self.filters, source))
+        sift(posts, filtered)
+
+        # Convert filtered Posts.xml file to SQLite db file
+        xml2db = XML2DB()
+        xml2db(filtered, dbfile)
+
+        return dbfile
+
+    def size(self, path, source):
+        """
+        Calculates the size of the raw archive files for a source.
+
+        Args:
+            path: input directory path with raw source data directories
+            source: source name
+
+        Returns:
+            total size in bytes
+        """
+
+        return sum(
+            os.path.getsize(archive)
+            for archive in glob.glob(os.path.join(path, source, "*.7z"))
+        )
 
 
 if __name__ == "__main__":
+    # Command line parser
+    parser = argparse.ArgumentParser(description="Stack Exchange ETL")
+    parser.add_argument("path", help="data directory", metavar="PATH")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="number of worker processes used to process sources",
+        metavar="WORKERS",
+    )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help="stream xml through the pipeline without writing intermediate xml files",
+    )
+
+    parser.add_argument(
+        "-i",
+        "--incremental",
+        action="store_true",
+        help="update an existing questions database in place and track changed rows",
+    )
+
+    parser.add_argument(
+        "-f",
+        "--filters",
+        help="path to a YAML filters file with question filters and sources to process",
+        metavar="FILTERS",
+    )
+
+    parser.add_argument(
+        "-m",
+        "--markdown",
+        action="store_true",
+        help="precompute answer markdown to speed up rendering search results",
+    )
+
+    # Parse command line arguments
+    args = parser.parse_args()
+
     # Input data directory
-    path = sys.argv[1]
-    if not os.path.exists(path):
+    if not os.path.exists(args.path):
         print("Data directory does not exist, exiting")
         sys.exit()
 
     # Run ETL process
-    execute = Execute()
-    execute(path)
+    execute = Execute(Filters.load(args.filters) if args.filters else None)
+    execute(args.path, args.workers, args.stream, args.incremental, args.markdown)
+
+    # Print timing and metrics summary
+    Metrics.summary()
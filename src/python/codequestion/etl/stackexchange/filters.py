@@ -0,0 +1,175 @@
+"""
+Filters module
+"""
+
+import re
+
+import yaml
+
+from .db2qa import DB2QA
+
+
+class Filters:
+    """
+    Question filters applied while sifting a raw Posts.xml file. Questions are matched on a minimum score, tags, a
+    last activity date range and a maximum number of questions per source. Rejected questions and their answers never
+    reach the staging database.
+
+    Filters are configured with a dict, typically read from a YAML file:
+
+        score: 50
+        tags:
+          include: [python, pandas]
+          exclude: [r]
+        dates:
+          start: 2020-01-01
+          end: 2024-01-01
+        limit: 10000
+        limits:
+          stackoverflow: 50000
+        sources: [stackoverflow, datascience]
+    """
+
+    # Precompiled field patterns, by line type
+    PATTERNS = {
+        str: (
+            re.compile(r"Score=\"([0-9]+)\""),
+            re.compile(r"Tags=\"([^\"]*)\""),
+            re.compile(r"LastActivityDate=\"([^\"]*)\""),
+            re.compile(r"&lt;|&gt;|\|"),
+        ),
+        bytes: (
+            re.compile(rb"Score=\"([0-9]+)\""),
+            re.compile(rb"Tags=\"([^\"]*)\""),
+            re.compile(rb"LastActivityDate=\"([^\"]*)\""),
+            re.compile(rb"&lt;|&gt;|\|"),
+        ),
+    }
+
+    def __init__(self, config=None, source=None):
+        """
+        Creates a new Filters instance.
+
+        Args:
+            config: filters configuration
+            source: source name, used to resolve the maximum number of questions
+        """
+
+        config = config if config else {}
+
+        # Minimum question score
+        self.score = config.get("score", 10)
+
+        # Tags, a question must have at least one included tag and no excluded tags
+        tags = config.get("tags", {})
+        include, exclude = tags.get("include", []), tags.get("exclude", [])
+
+        # Last activity date range, start is inclusive and end is exclusive. YAML dates are converted to ISO strings.
+        dates = config.get("dates", {})
+        start, end = dates.get("start"), dates.get("end")
+        start, end = str(start) if start else None, str(end) if end else None
+
+        # Maximum number of questions for source
+        self.limit = config.get("limits", {}).get(source, config.get("limit"))
+
+        # Filter values by line type
+        self.values = {
+            str: (set(include), set(exclude), start, end),
+            bytes: (
+                {tag.encode() for tag in include},
+                {tag.encode() for tag in exclude},
+                start.encode() if start else None,
+                end.encode() if end else None,
+            ),
+        }
+
+    def __call__(self, line):
+        """
+        Checks if a question line matches the filters.
+
+        Args:
+            line: question line, str or bytes
+
+        Returns:
+            True if the question matches, False otherwise
+        """
+
+        score, tags, date, separator = Filters.PATTERNS[type(line)]
+        include, exclude, start, end = self.values[type(line)]
+
+        # Minimum score
+        if self.parse(score, line, -1, int) < self.score:
+            return False
+
+        # Tags
+        if include or exclude:
+            values = set(separator.split(self.parse(tags, line, line[:0])))
+            if (include and not values & include) or values & exclude:
+                return False
+
+        # Last activity date range
+        if start or end:
+            value = self.parse(date, line, None)
+            if not value or (start and value < start) or (end and value >= end):
+                return False
+
+        return True
+
+    def parse(self, pattern, line, default, method=None):
+        """
+        Parses a field value.
+
+        Args:
+            pattern: compiled regex pattern
+            line: input line
+            default: value returned if the field isn't found
+            method: optional method used to convert the value
+
+        Returns:
+            field value
+        """
+
+        field = pattern.search(line)
+        if not field:
+            return default
+
+        return method(field.group(1)) if method else field.group(1)
+
+    @staticmethod
+    def load(path):
+        """
+        Reads a filters configuration file.
+
+        Args:
+            path: path to YAML or JSON file
+
+        Returns:
+            filters configuration
+        """
+
+        with open(path, encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+
+        Filters.validate(config)
+
+        return config
+
+    @staticmethod
+    def validate(config):
+        """
+        Checks that the sources and per-source limits in a filters configuration name known sources. Raises a
+        ValueError listing the unknown and valid sources otherwise.
+
+        Args:
+            config: filters configuration
+        """
+
+        config = config if config else {}
+
+        sources = list(config.get("sources", [])) + list(config.get("limits", {}))
+        unknown = [source for source in sources if source not in DB2QA.SOURCES]
+        if unknown:
+            raise ValueError(
+                f"Unknown sources: {', '.join(str(source) for source in unknown)}. "
+                f"Valid sources: {', '.join(DB2QA.SOURCES)}"
+            )
@@ -6,6 +6,8 @@ import os
 import xml.etree.cElementTree as etree
 import sqlite3
 
+from ...metrics import Metrics
+
 
 class XML2DB:
     """
@@ -45,16 +47,44 @@ class XML2DB:
     CREATE_TABLE = "CREATE TABLE IF NOT EXISTS {table} ({fields})"
     INSERT_ROW = "INSERT INTO {table} ({columns}) VALUES ({values})"
 
+    # Bulk load settings
+    PRAGMAS = [
+        "PRAGMA journal_mode=OFF",
+        "PRAGMA synchronous=OFF",
+        "PRAGMA cache_size=-262144",
+    ]
+
+    def __init__(self, batch=10000):
+        """
+        Creates a new XML2DB instance.
+
+        Args:
+            batch: number of rows to buffer before executing a bulk insert
+        """
+
+        self.batch = batch
+
+        # Prepared insert statements by PostTypeId. PostType="1" - Question, PostType="2" - Answer
+        self.statements = {
+            "1": self.statement(XML2DB.QUESTIONS, "questions"),
+            "2": self.statement(XML2DB.ANSWERS, "answers"),
+        }
+
+        # Buffered rows by PostTypeId
+        self.buffers = {key: [] for key in self.statements}
+
     def __call__(self, infile, dbfile):
         """
         Converts xml infile to SQLite dbfile.
 
         Args:
-            infile: input xml file
+            infile: input xml file or iterable of xml lines
             dbfile: output sqlite file
         """
 
-        print(f"Converting {infile} to {dbfile}")
+        print(
+            f"Converting {infile if isinstance(infile, str) else 'stream'} to {dbfile}"
+        )
 
         # Delete existing file
         if os.path.exists(dbfile):
@@ -63,30 +93,72 @@ class XML2DB:
         # Create new database
         db = sqlite3.connect(dbfile)
 
+        # Apply bulk load settings
+        for pragma in XML2DB.PRAGMAS:
+            db.execute(pragma)
+
         # Create database tables if necessary
         self.create(db, XML2DB.QUESTIONS, "questions")
         self.create(db, XML2DB.ANSWERS, "answers")
 
         count = 0
-        with open(infile, encoding="utf-8") as xml:
-            context, root = self.xmlstream(xml)
+        with Metrics.timer("xml2db"):
+            for row in self.rows(infile):
+                # Buffer row for insert
+                self.insert(db, row)
 
-            for event, row in context:
-                if event == "end":
-                    # Execute insert statement
-                    self.insert(db, row)
+                count += 1
+                if count % 10000 == 0:
+                    print(f"Inserted {count} rows")
 
-                    count += 1
-                    if count % 10000 == 0:
-                        print(f"Inserted {count} rows")
+            # Insert remaining rows
+            self.flush(db)
 
-                    # Free memory
-                    root.clear()
+        Metrics.count("xml2db.rows", count)
 
         print(f"Total rows inserted: {count}")
 
-        # Commit changes
-        db.commit()
+        # Close database
+        db.close()
+
+    def rows(self, infile):
+        """
+        Iterates over xml row elements. Memory is freed after each row is processed. This method is a generator
+        and will yield a row at a time.
+
+        Args:
+            infile: input xml file or iterable of xml lines
+        """
+
+        if isinstance(infile, str):
+            with open(infile, encoding="utf-8") as xml:
+                context, root = self.xmlstream(xml)
+
+                for event, row in context:
+                    if event == "end":
+                        yield row
+
+                        # Free memory
+                        root.clear()
+        else:
+            # Incrementally parse streamed lines
+            parser = etree.XMLPullParser(events=("start", "end"))
+            root = None
+
+            for line in infile:
+                parser.feed(line)
+
+                for event, row in parser.read_events():
+                    if root is None:
+                        # First event is the root element
+                        root = row
+                    elif event == "end" and row is not root:
+                        yield row
+
+                        # Free memory
+                        root.clear()
+
+            parser.close()
 
     def create(self, db, table, name):
         """
@@ -130,9 +202,30 @@ class XML2DB:
 
         return context, root
 
+    def statement(self, table, name):
+        """
+        Builds an insert prepared statement.
+
+        Args:
+            table: table schema
+            name: table name
+
+        Returns:
+            (insert statement, table schema, column names)
+        """
+
+        columns = [name for name, _ in table.items()]
+        insert = XML2DB.INSERT_ROW.format(
+            table=name,
+            columns=", ".join(columns),
+            values=("?, " * len(columns))[:-2],
+        )
+
+        return (insert, table, columns)
+
     def insert(self, db, row):
         """
-        Inserts row into database.
+        Buffers row for insert into database. Buffers are inserted once the batch size is reached.
 
         Args:
             db: database connection
@@ -141,21 +234,32 @@ class XML2DB:
 
         if "PostTypeId" in row.attrib:
             # PostType="1" - Question, PostType="2" - Answer
-            table = (
-                XML2DB.QUESTIONS if row.attrib["PostTypeId"] == "1" else XML2DB.ANSWERS
-            )
-            name = "questions" if row.attrib["PostTypeId"] == "1" else "answers"
-
-            # Build insert prepared statement
-            columns = [name for name, _ in table.items()]
-            insert = XML2DB.INSERT_ROW.format(
-                table=name,
-                columns=", ".join(columns),
-                values=("?, " * len(columns))[:-2],
-            )
-
-            # Execute insert statement
-            db.execute(insert, self.values(table, row, columns))
+            key = "1" if row.attrib["PostTypeId"] == "1" else "2"
+            _, table, columns = self.statements[key]
+
+            # Buffer row values
+            buffer = self.buffers[key]
+            buffer.append(self.values(table, row, columns))
+
+            if len(buffer) >= self.batch:
+                self.flush(db)
+
+    def flush(self, db):
+        """
+        Inserts all buffered rows into the database as a single transaction.
+
+        Args:
+            db: database connection
+        """
+
+        for key, buffer in self.buffers.items():
+            if buffer:
+                # Execute bulk insert
+                db.executemany(self.statements[key][0], buffer)
+                buffer.clear()
+
+        # Commit transaction
+        db.commit()
 
     def values(self, table, row, columns):
         """
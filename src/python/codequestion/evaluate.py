@@ -4,13 +4,18 @@ Evaluate module
 
 import argparse
 import csv
+import json
+import math
 import os
 
+import numpy as np
+
 from scipy.stats import pearsonr, spearmanr
 from tqdm import tqdm
 from txtai.embeddings import Embeddings
 
 from .models import Models
+from .search import Search
 from .tokenizer import Tokenizer
 
 
@@ -19,54 +24,134 @@ class StackExchange:
     Stack Exchange query-answer dataset.
     """
 
-    def __call__(self, path, method):
+    # Cutoffs for Recall@k
+    RECALL = [1, 3, 5, 10]
+
+    # Number of results per query
+    LIMIT = 10
+
+    # Result columns
+    COLUMNS = "id, sourceid, source"
+
+    def __call__(self, path, method, batch=64):
         """
         Evaluates a pre-trained model against the Stack Exchange query-answer dataset.
 
         Args:
             path: path to tests
             method: run method
+            batch: number of queries to run at a time
+
+        Returns:
+            dict of metrics
         """
 
         # Load model
         embeddings = self.load()
 
-        # Statistics
-        mrr = []
-
         # Build scoring index
         if method in ("bm25", "tfidf", "sif"):
             scoring = Embeddings({"keyword": True, "content": True})
             scoring.index(self.stream(embeddings, "Building keyword index"))
             embeddings = scoring
 
-        # Run test data
+        # Run queries through the same search path as the application
+        search = Search(cachesize=0, verbose=False, embeddings=embeddings)
+
+        # Read test data
+        queries, targets = self.read(path)
+
+        # Run test data in batches and get the rank of the expected result for each query
+        ranks = []
+        for x in tqdm(range(0, len(queries), batch), desc="Running queries"):
+            results = search.batch(
+                queries[x : x + batch], StackExchange.LIMIT, StackExchange.COLUMNS
+            )
+            for result, target in zip(results, targets[x : x + batch]):
+                ranks.append(self.rank(result, target))
+
+        # Calculate stats
+        metrics = self.metrics(ranks)
+
+        print("Mean Reciprocal Rank = ", metrics["mrr"])
+        for k in StackExchange.RECALL:
+            print(f"Recall@{k} = ", metrics[f"recall@{k}"])
+        print(f"nDCG@{StackExchange.LIMIT} = ", metrics[f"ndcg@{StackExchange.LIMIT}"])
+
+        return metrics
+
+    def read(self, path):
+        """
+        Reads the Stack Exchange query test file.
+
+        Args:
+            path: path to tests
+
+        Returns:
+            (queries, [(sourceid, source)])
+        """
+
+        queries, targets = [], []
         with open(
             os.path.join(path, "stackexchange", "query.txt"), encoding="utf-8"
         ) as rows:
             for row in rows:
                 query, sourceid, source, _ = row.split("|", 3)
-                print(query, sourceid, source)
+                queries.append(query)
+                targets.append((int(sourceid), source))
+
+        return queries, targets
+
+    def rank(self, results, target):
+        """
+        Finds the position of the expected result within results.
+
+        Args:
+            results: search results
+            target: expected (sourceid, source)
+
+        Returns:
+            0-based rank, -1 if not found
+        """
+
+        for x, result in enumerate(results):
+            if (result["sourceid"], result["source"]) == target:
+                return x
+
+        return -1
+
+    def metrics(self, ranks):
+        """
+        Calculates Mean Reciprocal Rank (MRR), Recall@k and nDCG. Each query has a single relevant result, so the
+        ideal DCG is 1.
+
+        Args:
+            ranks: 0-based rank of the expected result for each query, -1 if not found
 
-                # Run search
-                results = self.search(embeddings, query)
+        Returns:
+            dict of metrics
+        """
 
-                # Get row index within results
-                index = -1
-                for x, result in enumerate(results):
-                    if (
-                        int(sourceid) == result["sourceid"]
-                        and source == result["source"]
-                    ):
-                        index = x
+        total = len(ranks) if ranks else 1
 
-                # Calculate stats
-                calc = 1 / (1 + index) if index != -1 else 0.0
-                print(calc)
-                mrr.append(calc)
+        metrics = {
+            "queries": len(ranks),
+            "mrr": sum(1 / (1 + rank) for rank in ranks if rank != -1) / total,
+        }
 
-        mrr = sum(mrr) / len(mrr)
-        print("Mean Reciprocal Rank = ", mrr)
+        for k in StackExchange.RECALL:
+            metrics[f"recall@{k}"] = sum(1 for rank in ranks if 0 <= rank < k) / total
+
+        metrics[f"ndcg@{StackExchange.LIMIT}"] = (
+            sum(
+                1 / math.log2(rank + 2)
+                for rank in ranks
+                if 0 <= rank < StackExchange.LIMIT
+            )
+            / total
+        )
+
+        return metrics
 
     def load(self):
         """
@@ -101,41 +186,6 @@ class StackExchange:
 
                 progress.update(batch)
 
-    def search(self, embeddings, query):
-        """
-        Executes a search.
-
-        Args:
-            embeddings: embeddings instance
-            query: query to run
-
-        Returns:
-            search results
-        """
-
-        results = None
-        if embeddings.isweighted():
-            # Use custom tokenizer for word vector models
-            uids = [
-                row["id"] for row in embeddings.search(Tokenizer.tokenize(query), 10)
-            ]
-
-            # Get source id + source for each result
-            results = []
-            for uid in uids:
-                results.append(
-                    embeddings.search(
-                        f"select sourceid, source from txtai where id = {uid}"
-                    )[0]
-                )
-        else:
-            # Select source id + source with standard similar clause
-            results = embeddings.search(
-                f"select sourceid, source from txtai where similar('{query}') limit 10"
-            )
-
-        return results
-
 
 class STS:
     """
@@ -152,6 +202,9 @@ class STS:
         Args:
             path: path to tests
             method: run method
+
+        Returns:
+            dict of metrics
         """
 
         # Load embeddings instance - used to calculate similarity
@@ -159,7 +212,7 @@ class STS:
         embeddings.load(Models.modelPath("stackexchange"))
 
         # Test model against sts dataset
-        self.test(embeddings, path, method)
+        return self.test(embeddings, path, method)
 
     def test(self, embeddings, path, method):
         """
@@ -169,6 +222,9 @@ class STS:
             embeddings: embeddings instance
             path: path to tests
             method: run method
+
+        Returns:
+            dict of metrics
         """
 
         # Test file path
@@ -179,27 +235,62 @@ class STS:
         # Read test data
         rows = self.read(path)
 
-        # Calculated scores and ground truth labels
-        scores = []
-        labels = []
+        texts1, texts2 = [row[2] for row in rows], [row[3] for row in rows]
 
-        for row in rows:
-            text1, text2 = row[2], row[3]
+        # Use custom tokenizer for word vector models
+        if embeddings.isweighted():
+            texts1 = Tokenizer.batchtokenize(texts1)
+            texts2 = Tokenizer.batchtokenize(texts2)
+
+        # Skip pairs with an empty text
+        pairs = [
+            (text1, text2, row[1])
+            for text1, text2, row in zip(texts1, texts2, rows)
+            if text1 and text2
+        ]
+
+        # Calculated scores and ground truth labels normalized between 0 - 1
+        scores = self.similarity(
+            embeddings, [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+        )
+        labels = [pair[2] for pair in pairs]
+
+        pearson, spearman = pearsonr(scores, labels), spearmanr(scores, labels)
+
+        print("Pearson score =", pearson)
+        print("Spearman score =", spearman)
+
+        return {
+            "pairs": len(pairs),
+            "pearson": float(pearson[0]),
+            "spearman": float(spearman[0]),
+        }
+
+    def similarity(self, embeddings, texts1, texts2):
+        """
+        Calculates the similarity of each text pair. All texts are encoded in batches and scored with a single
+        row-wise dot product, which equals cosine similarity for normalized vectors.
+
+        Args:
+            embeddings: embeddings instance
+            texts1: list of first texts in each pair
+            texts2: list of second texts in each pair
 
-            # Use custom tokenizer for word vector models
-            if embeddings.isweighted():
-                text1 = Tokenizer.tokenize(text1)
-                text2 = Tokenizer.tokenize(text2)
+        Returns:
+            list of scores
+        """
 
-            if text1 and text2:
-                score = embeddings.similarity(text1, [text2])[0][1]
-                scores.append(score)
+        if not texts1:
+            return []
 
-                # Ground truth score normalized between 0 - 1
-                labels.append(row[1])
+        queries = embeddings.batchtransform(
+            ((None, text, None) for text in texts1), "query"
+        )
+        data = embeddings.batchtransform(
+            ((None, text, None) for text in texts2), "data"
+        )
 
-        print("Pearson score =", pearsonr(scores, labels))
-        print("Spearman score =", spearmanr(scores, labels))
+        return np.einsum("ij,ij->i", queries, data).tolist()
 
     def read(self, path):
         """
@@ -238,12 +329,37 @@ if __name__ == "__main__":
         "-p", "--path", required=True, help="path to test files", metavar="PATH"
     )
     parser.add_argument("-m", "--method", help="run method", metavar="METHOD")
+    parser.add_argument(
+        "-b",
+        "--batch",
+        type=int,
+        default=64,
+        help="number of queries to run at a time",
+        metavar="BATCH",
+    )
+    parser.add_argument(
+        "-o", "--output", help="write a JSON report to this file", metavar="OUTPUT"
+    )
 
     # Parse command line arguments
     args = parser.parse_args()
 
-    # Get eval action
-    action = STS() if args.source.lower() == "sts" else StackExchange()
-
     # Run eval action
-    action(args.path, args.method)
+    if args.source.lower() == "sts":
+        metrics = STS()(args.path, args.method)
+    else:
+        metrics = StackExchange()(args.path, args.method, args.batch)
+
+    # Write JSON report
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(
+                {
+                    "source": args.source,
+                    "method": args.method,
+                    "model": Models.modelPath("stackexchange"),
+                    "metrics": metrics,
+                },
+                output,
+                indent=2,
+            )
@@ -2,16 +2,83 @@
 Index module
 """
 
+import argparse
+import itertools
 import os.path
+import pickle
 import sqlite3
 import sys
+import tempfile
 
 from tqdm import tqdm
 from txtai.app import Application
 from txtai.embeddings import Embeddings
 
+from .metrics import Metrics
 from .models import Models
 from .tokenizer import Tokenizer
+from .topics import Topics
+
+
+class TokenCache:
+    """
+    Caches token lists in a temporary spill file. Token lists are written in row order on the first pass and
+    replayed in the same order on later passes, which avoids tokenizing the same text multiple times. Rows must be
+    read in the same order on each pass.
+
+    TokenCache is a context manager, the spill file is deleted on exit.
+    """
+
+    def __init__(self):
+        """
+        Creates a new TokenCache.
+        """
+
+        # pylint: disable=R1732
+        self.spill = tempfile.TemporaryFile()
+        self.count = 0
+
+    def write(self, tokens):
+        """
+        Writes token lists to the spill file. This method is a generator and will yield each list of tokens after it's written.
+
+        Args:
+            tokens: iterable of token lists
+
+        Returns:
+            lists of tokens
+        """
+
+        for x in tokens:
+            pickle.dump(x, self.spill, protocol=pickle.HIGHEST_PROTOCOL)
+            self.count += 1
+
+            yield x
+
+    def read(self):
+        """
+        Reads token lists from the start of the spill file. This method is a generator and will yield a list of tokens at a time.
+
+        Returns:
+            lists of tokens
+        """
+
+        self.spill.seek(0)
+        for _ in range(self.count):
+            yield pickle.load(self.spill)
+
+    def close(self):
+        """
+        Closes and deletes the spill file.
+        """
+
+        self.spill.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
 
 class Index:
@@ -19,17 +86,39 @@ class Index:
     Builds a new embeddings index.
     """
 
-    def __call__(self, config, dbfile):
+    def __init__(self, workers=None, chunksize=1000):
+        """
+        Creates a new Index instance.
+
+        Args:
+            workers: number of tokenization worker processes for word vector models, tokenizes in the current process if None
+            chunksize: number of texts sent to a tokenization worker process at a time
+        """
+
+        self.workers = workers
+        self.chunksize = chunksize
+
+    def __call__(self, config, dbfile, update=False):
         """
         Builds and saves an embeddings index.
 
         Args:
             config: input configuration file
             dbfile: input SQLite file
+            update: if True, the existing index is updated with changed rows from an incremental ETL run
         """
 
-        embeddings = self.build(config, dbfile)
-        embeddings.save(Models.modelPath("stackexchange"))
+        with Metrics.timer("index.update" if update else "index.build"):
+            embeddings = self.update(dbfile) if update else self.build(config, dbfile)
+
+        with Metrics.timer("index.save"):
+            embeddings.save(Models.modelPath("stackexchange"))
+
+        # Save topic label index, loaded by the console when topics are first queried
+        if embeddings.graph and embeddings.graph.topics:
+            print("Building topics index")
+            with Metrics.timer("index.topics"):
+                Topics.build(embeddings.graph.topics).save(Topics.path())
 
     def build(self, config, dbfile):
         """
@@ -55,14 +144,111 @@ class Index:
 
         # Build scoring index, if scoring method provided
         if embeddings.isweighted():
-            embeddings.score(self.stream(dbfile, embeddings, "Building scoring index"))
+            # Tokenize each row once and replay cached tokens for the embeddings index
+            with TokenCache() as cache:
+                embeddings.score(
+                    self.stream(
+                        dbfile, embeddings, "Building scoring index", cache=cache
+                    )
+                )
+
+                embeddings.index(
+                    self.stream(
+                        dbfile, embeddings, "Building embeddings index", cache=cache
+                    )
+                )
+        else:
+            # Build embeddings index
+            embeddings.index(
+                self.stream(dbfile, embeddings, "Building embeddings index")
+            )
+
+        return embeddings
+
+    def update(self, dbfile):
+        """
+        Updates an existing embeddings index with the changes table of an incremental ETL run. New and
+        modified rows are upserted, removed rows are deleted.
+
+        Scoring weights of word vector models are computed at build time and aren't updated. Term weights stay frozen
+        until the next full build.
+
+        Args:
+            dbfile: input SQLite file
+
+        Returns:
+            embeddings index
+        """
+
+        # Update requires the changes table of an incremental ETL run
+        if not self.haschanges(dbfile):
+            raise ValueError(
+                f"Unable to update codequestion model, no changes table found in {dbfile}. "
+                "Run the ETL process with --incremental first."
+            )
+
+        path = Models.modelPath("stackexchange")
+
+        # Load existing embeddings index
+        embeddings = Embeddings()
+        if not embeddings.exists(path):
+            raise FileNotFoundError(
+                f"Unable to update codequestion model, no model found at {path}"
+            )
+
+        embeddings.load(path)
+
+        if embeddings.isweighted():
+            print(
+                "Scoring weights aren't updated, run a full build to refresh term weights"
+            )
+
+        # Upsert new and modified rows
+        embeddings.upsert(
+            self.stream(
+                dbfile,
+                embeddings,
+                "Upserting changed rows",
+                "WHERE Id IN (SELECT Id FROM changes WHERE Action IN ('insert', 'update'))",
+            )
+        )
+
+        # Delete removed rows
+        db = sqlite3.connect(dbfile)
+        ids = [
+            uid
+            for (uid,) in db.execute(
+                "SELECT Id FROM changes WHERE Action = 'delete'"
+            ).fetchall()
+        ]
+        db.close()
 
-        # Build embeddings index
-        embeddings.index(self.stream(dbfile, embeddings, "Building embeddings index"))
+        if ids:
+            print(f"Deleting {len(ids)} rows")
+            embeddings.delete(ids)
 
         return embeddings
 
-    def stream(self, dbfile, embeddings, message):
+    def haschanges(self, dbfile):
+        """
+        Checks if a questions.db file has a changes table from an incremental ETL run.
+
+        Args:
+            dbfile: input SQLite file
+
+        Returns:
+            True if the changes table exists, False otherwise
+        """
+
+        db = sqlite3.connect(dbfile)
+        table = db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'changes'"
+        ).fetchone()
+        db.close()
+
+        return table is not None
+
+    def stream(self, dbfile, embeddings, message, where="", cache=None):
         """
         Streams questions from a questions.db file. This method is a generator and will yield a row at time.
 
@@ -70,6 +256,8 @@ class Index:
             dbfile: input SQLite file
             embeddings: embeddings instance
             message: progress bar message
+            where: optional where clause to filter rows
+            cache: optional TokenCache, token lists are written on the first pass and replayed on later passes
         """
 
         # Connection to database file
@@ -78,49 +266,151 @@ class Index:
         cur = db.cursor()
 
         # Get total number of questions
-        cur.execute("SELECT count(*) from Questions")
+        cur.execute(f"SELECT count(*) from Questions {where}")
         total = cur.fetchone()[0]
 
-        # Query for iterating over questions.db rows
+        # Read precomputed markdown answers, if available
+        columns = [row[1] for row in cur.execute("PRAGMA table_info(questions)")]
+        markdown = ", Markdown" if "Markdown" in columns else ""
+
+        # Query for iterating over questions.db rows. Rows are read in Id order, which keeps cached tokens paired with rows.
         cur.execute(
-            "SELECT Id, Source, SourceId, Date, Tags, Question, QuestionUser, Answer, AnswerUser, Reference FROM Questions"
+            "SELECT Id, Source, SourceId, Date, Tags, Question, QuestionUser, Answer, AnswerUser, Reference"
+            + f"{markdown} FROM Questions {where} ORDER BY Id"
         )
 
-        for row in tqdm(cur, total=total, desc=message):
-            # Transform all keys to lowercase
-            row = {k.lower(): row[k] for k in row.keys()}
-
-            # Store answer as object
-            row["object"] = row.pop("answer")
+        rows = (self.transform(row) for row in tqdm(cur, total=total, desc=message))
 
-            # Build text and yield (id, text, tags) tuple
-            row["text"] = row["question"] + " " + row["source"] + " " + row["tags"]
-
-            # Use custom tokenizer for word vector models
-            if embeddings.isweighted():
-                row["text"] = Tokenizer.tokenize(row["text"])
+        # Use custom tokenizer for word vector models
+        if embeddings.isweighted():
+            rows = self.tokenize(rows, cache)
 
+        count = 0
+        for row in rows:
             # Yield document
             yield (row["id"], row, row["tags"])
+            count += 1
+
+        Metrics.count("index.rows", count)
 
         # Free database resources
         db.close()
 
+    def transform(self, row):
+        """
+        Transforms a questions.db row into an indexing document.
+
+        Args:
+            row: database row
+
+        Returns:
+            document dict
+        """
+
+        # Transform all keys to lowercase
+        row = {k.lower(): row[k] for k in row.keys()}
+
+        # Store answer as object, use precomputed markdown when available
+        answer, markdown = row.pop("answer"), row.pop("markdown", None)
+        row["object"], row["format"] = (
+            (markdown, "markdown") if markdown else (answer, "html")
+        )
+
+        # Build text
+        row["text"] = row["question"] + " " + row["source"] + " " + row["tags"]
+
+        return row
+
+    def tokenize(self, rows, cache):
+        """
+        Tokenizes the text of each document. Tokenization runs across a pool of worker processes when workers
+        is set. This method is a generator and will yield a document at a time, in input order.
+
+        Args:
+            rows: iterable of documents
+            cache: optional TokenCache
+
+        Returns:
+            documents with tokenized text
+        """
+
+        if cache and cache.count:
+            # Replay cached token lists
+            tokens = cache.read()
+        else:
+            # Split rows into a row stream and a text stream
+            rows, texts = itertools.tee(rows)
+            texts = (row["text"] for row in texts)
+
+            tokens = (
+                Tokenizer.parallel(texts, self.workers, self.chunksize)
+                if self.workers
+                else (Tokenizer.tokenize(text) for text in texts)
+            )
+
+            # Write token lists to cache
+            if cache:
+                tokens = cache.write(tokens)
+
+        for row, text in zip(rows, tokens):
+            row["text"] = text
+            yield row
+
 
 # pylint: disable=C0103
 if __name__ == "__main__":
+    # Command line parser
+    parser = argparse.ArgumentParser(description="Index")
+    parser.add_argument(
+        "config", help="path to index configuration file", metavar="CONFIG"
+    )
+    parser.add_argument("dbfile", help="path to questions.db file", metavar="DBFILE")
+    parser.add_argument(
+        "-u",
+        "--update",
+        action="store_true",
+        help="update the existing index with changes from an incremental ETL run",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="number of tokenization worker processes for word vector models",
+        metavar="WORKERS",
+    )
+    parser.add_argument(
+        "-c",
+        "--chunksize",
+        type=int,
+        default=1000,
+        help="number of texts sent to a tokenization worker process at a time",
+        metavar="CHUNKSIZE",
+    )
+
+    # Parse command line arguments
+    args = parser.parse_args()
+
     # Path to index configuration file
-    config = sys.argv[1] if len(sys.argv) > 1 else None
-    if not config or not os.path.exists(config):
+    if not args.update and not os.path.exists(args.config):
         print("Path to index configuration file does not exist, exiting")
         sys.exit()
 
     # Path to questions.db file
-    dbfile = sys.argv[2] if len(sys.argv) > 1 else None
-    if not dbfile or not os.path.exists(dbfile):
+    if not os.path.exists(args.dbfile):
         print("Path to questions.db file does not exist, exiting")
         sys.exit()
 
+    index = Index(args.workers, args.chunksize)
+
+    # Update requires the changes table of an incremental ETL run
+    if args.update and not index.haschanges(args.dbfile):
+        print(
+            "questions.db has no changes table, run the ETL process with --incremental before updating, exiting"
+        )
+        sys.exit()
+
     # Build index
-    index = Index()
-    index(config, dbfile)
+    index(args.config, args.dbfile, args.update)
+
+    # Print timing and metrics summary
+    Metrics.summary()
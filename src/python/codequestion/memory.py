@@ -0,0 +1,141 @@
+"""
+Memory module
+"""
+
+import argparse
+import multiprocessing
+import os.path
+import time
+
+from .search import Search
+
+
+class Memory:
+    """
+    Measures memory usage per worker process when loading the codequestion index with and without read-only mode.
+    """
+
+    def __call__(self, workers, queries):
+        """
+        Runs the benchmark.
+
+        Args:
+            workers: number of worker processes
+            queries: list of queries each worker runs after loading the index
+        """
+
+        print(f"{'mode':<10} {'rss/worker':>12} {'pss/worker':>12} {'load':>8}")
+        for mmap in (False, True):
+            stats = self.run(workers, queries, mmap)
+
+            rss = sum(stat["rss"] for stat in stats) / len(stats)
+            pss = sum(stat["pss"] for stat in stats) / len(stats)
+            load = sum(stat["load"] for stat in stats) / len(stats)
+
+            print(
+                f"{'mmap' if mmap else 'default':<10} {rss / 1024 / 1024:10.1f}MB "
+                f"{pss / 1024 / 1024:10.1f}MB {load:7.2f}s"
+            )
+
+    def run(self, workers, queries, mmap):
+        """
+        Starts worker processes and collects memory statistics once all workers have loaded the index.
+
+        Args:
+            workers: number of worker processes
+            queries: list of queries
+            mmap: if True, index is loaded in read-only mode
+
+        Returns:
+            list of statistics per worker
+        """
+
+        # Measure after all workers have loaded the index, shared pages are split across workers in PSS
+        context = multiprocessing.get_context("spawn")
+        barrier, results = context.Barrier(workers), context.Queue()
+
+        processes = [
+            context.Process(target=worker, args=(queries, mmap, barrier, results))
+            for _ in range(workers)
+        ]
+
+        for process in processes:
+            process.start()
+
+        stats = [results.get() for _ in processes]
+
+        for process in processes:
+            process.join()
+
+        return stats
+
+
+def worker(queries, mmap, barrier, results):
+    """
+    Benchmark worker process. Loads the index, runs queries and reports memory usage.
+
+    Args:
+        queries: list of queries
+        mmap: if True, index is loaded in read-only mode
+        barrier: synchronizes workers before measuring memory usage
+        results: output queue
+    """
+
+    start = time.time()
+    search = Search(cachesize=0, verbose=False, mmap=mmap)
+    load = time.time() - start
+
+    for query in queries:
+        search.search(query)
+
+    # Wait for all workers before measuring
+    barrier.wait()
+    rss, pss = usage()
+    barrier.wait()
+
+    results.put({"rss": rss, "pss": pss, "load": load})
+
+
+def usage():
+    """
+    Reads the resident set size (RSS) and proportional set size (PSS) of the current process. PSS splits shared pages
+    evenly across the processes that map them. This method requires Linux /proc.
+
+    Returns:
+        (rss, pss) in bytes
+    """
+
+    stats = {}
+    path = "/proc/self/smaps_rollup"
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                fields = line.split()
+                if fields[0] in ("Rss:", "Pss:"):
+                    stats[fields[0]] = int(fields[1]) * 1024
+
+    return stats.get("Rss:", 0), stats.get("Pss:", 0)
+
+
+if __name__ == "__main__":
+    # Command line parser
+    parser = argparse.ArgumentParser(
+        description="Read-only index memory usage benchmark"
+    )
+    parser.add_argument(
+        "-w", "--workers", type=int, default=4, help="number of worker processes"
+    )
+    parser.add_argument(
+        "-q",
+        "--query",
+        action="append",
+        help="query to run in each worker, can be repeated",
+        metavar="QUERY",
+    )
+
+    # Parse command line arguments
+    args = parser.parse_args()
+
+    # Run benchmark
+    memory = Memory()
+    memory(args.workers, args.query if args.query else ["python query sqlite"])
@@ -0,0 +1,326 @@
+"""
+Metrics module
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+# Resource usage is only available on Unix
+try:
+    import resource
+
+    RESOURCE = True
+except ImportError:
+    RESOURCE = False
+
+
+class Metrics:
+    """
+    Process-wide stage timers and counters. Pipeline stages report into this registry, which is printed as a summary
+    at the end of a run.
+
+    Profiling hooks are enabled with the CODEQUESTION_PROFILE environment variable, a comma separated list of hooks:
+    cprofile (function level profile per stage) and tracemalloc (peak Python memory per stage). Metrics are exported
+    when the CODEQUESTION_METRICS environment variable is set to a file path. Paths ending in .json are written as
+    JSON, all other paths as Prometheus text.
+    """
+
+    # Stage timers, {name: {calls, seconds, memory}}
+    timers = {}
+
+    # Counters, {name: value}
+    counters = {}
+
+    # Function profiles per stage, {name: pstats.Stats}
+    profiles = {}
+
+    # Active timers
+    stack = []
+
+    # Peak resident set size of merged worker processes
+    memory = 0
+
+    # Number of functions shown per profiled stage
+    FUNCTIONS = 10
+
+    @staticmethod
+    def hooks():
+        """
+        Reads the list of enabled profiling hooks.
+
+        Returns:
+            set of hook names
+        """
+
+        hooks = os.environ.get("CODEQUESTION_PROFILE", "")
+        return {hook.strip().lower() for hook in hooks.split(",") if hook.strip()}
+
+    @staticmethod
+    @contextlib.contextmanager
+    def timer(name):
+        """
+        Times a stage. Stages can be nested, each stage reports inclusive wall-clock time.
+
+        Args:
+            name: stage name
+        """
+
+        hooks = Metrics.hooks()
+        frame = {"peak": 0, "profile": None, "base": 0}
+
+        # Track peak memory, peak is reset per stage and carried up to enclosing stages on exit
+        if "tracemalloc" in hooks:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+            current, peak = tracemalloc.get_traced_memory()
+            if Metrics.stack:
+                parent = Metrics.stack[-1]
+                parent["peak"] = max(parent["peak"], peak)
+
+            frame["base"] = current
+
+            # Python 3.8 can't reset the peak, stage peaks then include earlier peaks in the traced session
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+
+        # Only one profiler can be active, profile the outermost profiled stage
+        if "cprofile" in hooks and not any(x["profile"] for x in Metrics.stack):
+            frame["profile"] = cProfile.Profile()
+            frame["profile"].enable()
+
+        Metrics.stack.append(frame)
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            Metrics.stack.pop()
+
+            timer = Metrics.timers.setdefault(name, {"calls": 0, "seconds": 0.0})
+            timer["calls"] += 1
+            timer["seconds"] += elapsed
+
+            if frame["profile"]:
+                frame["profile"].disable()
+                if name in Metrics.profiles:
+                    Metrics.profiles[name].add(frame["profile"])
+                else:
+                    Metrics.profiles[name] = pstats.Stats(frame["profile"])
+
+            if tracemalloc.is_tracing():
+                peak = max(tracemalloc.get_traced_memory()[1], frame["peak"])
+                timer["memory"] = max(timer.get("memory", 0), peak - frame["base"])
+
+                if Metrics.stack:
+                    parent = Metrics.stack[-1]
+                    parent["peak"] = max(parent["peak"], peak)
+                else:
+                    tracemalloc.stop()
+
+    @staticmethod
+    def rss():
+        """
+        Reads the peak resident set size of the current process.
+
+        Returns:
+            peak resident set size in bytes, None if not available on this platform
+        """
+
+        if not RESOURCE:
+            return None
+
+        # macOS reports bytes, other Unix platforms report kilobytes
+        memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return memory if sys.platform == "darwin" else memory * 1024
+
+    @staticmethod
+    def count(name, value=1):
+        """
+        Increments a counter.
+
+        Args:
+            name: counter name
+            value: amount to add
+        """
+
+        Metrics.counters[name] = Metrics.counters.get(name, 0) + value
+
+    @staticmethod
+    def data():
+        """
+        Gets all timers and counters.
+
+        Returns:
+            dict with timers, counters and the peak resident set size in bytes across this process and merged workers,
+            memory is None when resource usage isn't available
+        """
+
+        memory = Metrics.rss()
+
+        return {
+            "timers": {name: dict(timer) for name, timer in Metrics.timers.items()},
+            "counters": dict(Metrics.counters),
+            "memory": max(memory, Metrics.memory) if memory is not None else None,
+        }
+
+    @staticmethod
+    def merge(data):
+        """
+        Merges timers and counters collected in another process.
+
+        Args:
+            data: output of Metrics.data
+        """
+
+        for name, other in data["timers"].items():
+            timer = Metrics.timers.setdefault(name, {"calls": 0, "seconds": 0.0})
+            timer["calls"] += other["calls"]
+            timer["seconds"] += other["seconds"]
+            if "memory" in other:
+                timer["memory"] = max(timer.get("memory", 0), other["memory"])
+
+        for name, value in data["counters"].items():
+            Metrics.count(name, value)
+
+        if data["memory"] is not None:
+            Metrics.memory = max(Metrics.memory, data["memory"])
+
+    @staticmethod
+    def reset():
+        """
+        Clears all timers, counters and profiles.
+        """
+
+        Metrics.timers.clear()
+        Metrics.counters.clear()
+        Metrics.profiles.clear()
+        Metrics.memory = 0
+
+    @staticmethod
+    def summary():
+        """
+        Prints a summary of all timers, counters and profiles. Metrics are also exported when CODEQUESTION_METRICS
+        is set.
+        """
+
+        data = Metrics.data()
+
+        print(f"{'stage':<20} {'calls':>6} {'seconds':>10} {'memory':>10}")
+        for name, timer in data["timers"].items():
+            memory = (
+                f"{timer['memory'] / 1024 / 1024:8.1f}MB" if "memory" in timer else ""
+            )
+            print(
+                f"{name:<20} {timer['calls']:>6} {timer['seconds']:>10.2f} {memory:>10}"
+            )
+
+        for name, value in data["counters"].items():
+            print(f"{name:<20} {value:>17}")
+
+        if data["memory"] is not None:
+            print(f"Peak memory: {data['memory'] / 1024 / 1024:.1f}MB")
+
+        # Print top functions for each profiled stage
+        for name, stats in Metrics.profiles.items():
+            output = io.StringIO()
+            stats.stream = output
+            stats.sort_stats("cumulative").print_stats(Metrics.FUNCTIONS)
+            print(f"Profile: {name}")
+            print(output.getvalue().strip())
+
+        # Export metrics
+        path = os.environ.get("CODEQUESTION_METRICS")
+        if path:
+            Metrics.export(path)
+
+    @staticmethod
+    def export(path):
+        """
+        Writes all timers and counters to path. Paths ending in .json are written as JSON, all other paths are
+        written in the Prometheus text format.
+
+        Args:
+            path: output file path
+        """
+
+        data = Metrics.data()
+
+        with open(path, "w", encoding="utf-8") as output:
+            if path.lower().endswith(".json"):
+                json.dump(data, output, indent=2)
+            else:
+                output.write(Metrics.prometheus(data))
+
+    @staticmethod
+    def prometheus(data):
+        """
+        Formats metrics in the Prometheus text format.
+
+        Args:
+            data: output of Metrics.data
+
+        Returns:
+            metrics text
+        """
+
+        metrics = [
+            (
+                "codequestion_stage_seconds_total",
+                "counter",
+                "Wall-clock time spent in each stage",
+                [(name, timer["seconds"]) for name, timer in data["timers"].items()],
+                "stage",
+            ),
+            (
+                "codequestion_stage_calls_total",
+                "counter",
+                "Number of times each stage ran",
+                [(name, timer["calls"]) for name, timer in data["timers"].items()],
+                "stage",
+            ),
+            (
+                "codequestion_stage_memory_peak_bytes",
+                "gauge",
+                "Peak traced Python memory in each stage",
+                [
+                    (name, timer["memory"])
+                    for name, timer in data["timers"].items()
+                    if "memory" in timer
+                ],
+                "stage",
+            ),
+            (
+                "codequestion_count_total",
+                "counter",
+                "Pipeline counters",
+                list(data["counters"].items()),
+                "name",
+            ),
+        ]
+
+        lines = []
+        for metric, mtype, description, values, label in metrics:
+            if values:
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} {mtype}")
+                lines.extend(
+                    f'{metric}{{{label}="{name}"}} {value}' for name, value in values
+                )
+
+        if data["memory"] is not None:
+            lines.append(
+                "# HELP codequestion_memory_max_rss_bytes Peak resident set size"
+            )
+            lines.append("# TYPE codequestion_memory_max_rss_bytes gauge")
+            lines.append(f"codequestion_memory_max_rss_bytes {data['memory']}")
+
+        return "\n".join(lines) + "\n"
@@ -4,6 +4,8 @@ Path module
 
 from rich.console import Console
 
+from .query import Query
+
 
 class Path:
     """
@@ -21,6 +23,9 @@ class Path:
         self.embeddings = embeddings
         self.graph = embeddings.graph
 
+        # Parameterized query builder
+        self.query = Query(embeddings)
+
     def __call__(self, start, end):
         """
         Runs a path action.
@@ -33,7 +38,25 @@ class Path:
         console = Console()
 
         path = self.graph.showpath(start, end)
+
+        # Get questions for all nodes on the path with a single query
+        questions = self.questions(path)
+
         for x, uid in enumerate(path):
-            query = f"select question from txtai where id = '{uid}'"
-            question = self.embeddings.search(query, 1)[0]["question"]
-            console.print(f"{x + 1}. {question} ({uid})")
+            console.print(f"{x + 1}. {questions.get(str(uid))} ({uid})")
+
+    def questions(self, ids):
+        """
+        Gets questions for a list of ids.
+
+        Args:
+            ids: list of ids
+
+        Returns:
+            {id: question}
+        """
+
+        return {
+            result["id"]: result["question"]
+            for result in self.query.bulk([str(uid) for uid in ids], "id, question")
+        }
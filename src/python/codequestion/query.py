@@ -0,0 +1,172 @@
+"""
+Query module
+"""
+
+import copy
+
+from .cache import Cache
+
+
+class Parser:
+    """
+    Caches parsed SQL for a txtai database. Query templates with bound parameters are only parsed once.
+    """
+
+    def __init__(self, sql, size=256):
+        """
+        Creates a new parser.
+
+        Args:
+            sql: txtai SQL parser
+            size: maximum number of cached parsed queries
+        """
+
+        self.sql = sql
+        self.cache = Cache(size)
+
+    def __call__(self, query):
+        """
+        Parses a SQL query.
+
+        Args:
+            query: input query string or token list
+
+        Returns:
+            {clause name: clause text}
+        """
+
+        # Only cache SQL strings, token lists are parsed as similarity queries
+        if not isinstance(query, str):
+            return self.sql(query)
+
+        parsed = self.cache.get(query)
+        if parsed is None:
+            parsed = self.sql(query)
+            self.cache.put(query, parsed)
+
+        # Parsed queries are modified when run, return a copy
+        return copy.deepcopy(parsed)
+
+    def __getattr__(self, name):
+        return getattr(self.sql, name)
+
+
+class Query:
+    """
+    Builds parameterized queries for an embeddings index. Each query shape uses a fixed SQL template with bound
+    parameters, which parses once and works with any query text, including quotes.
+    """
+
+    # Query templates
+    SIMILAR = "select {columns} from txtai where similar(:query)"
+    MATCH = "select {columns} from txtai where {field} = :value"
+    BULK = "select {columns} from txtai where {field} in ({values})"
+
+    # Maximum number of values per bulk query
+    BATCH = 512
+
+    def __init__(self, embeddings):
+        """
+        Creates a new query builder.
+
+        Args:
+            embeddings: embeddings instance
+        """
+
+        self.embeddings = embeddings
+
+        # Reuse parsed query templates
+        database = embeddings.database
+        if database and not isinstance(database.sql, Parser):
+            database.sql = Parser(database.sql)
+
+    def similar(self, query, columns, limit):
+        """
+        Runs a similarity query.
+
+        Args:
+            query: query text
+            columns: columns to select
+            limit: maximum number of results
+
+        Returns:
+            list of results
+        """
+
+        return self.embeddings.search(
+            Query.SIMILAR.format(columns=columns), limit, parameters={"query": query}
+        )
+
+    def batchsimilar(self, queries, columns, limit):
+        """
+        Runs a batch of similarity queries.
+
+        Args:
+            queries: list of query text
+            columns: columns to select
+            limit: maximum number of results per query
+
+        Returns:
+            list of results per query
+        """
+
+        return self.embeddings.batchsearch(
+            [Query.SIMILAR.format(columns=columns)] * len(queries),
+            limit,
+            parameters=[{"query": query} for query in queries],
+        )
+
+    def match(self, value, columns, field="id"):
+        """
+        Looks up rows by field value.
+
+        Args:
+            value: field value
+            columns: columns to select
+            field: field to match
+
+        Returns:
+            list of results
+        """
+
+        return self.embeddings.search(
+            Query.MATCH.format(columns=columns, field=field),
+            1,
+            parameters={"value": value},
+        )
+
+    def bulk(self, values, columns, field="id"):
+        """
+        Looks up rows for a list of field values. Values are sent in batches. Each batch is padded to the next power
+        of two, which limits the number of distinct query templates.
+
+        Args:
+            values: list of field values
+            columns: columns to select
+            field: field to match
+
+        Returns:
+            list of results
+        """
+
+        # Unique values
+        values = list(dict.fromkeys(values))
+
+        results = []
+        for x in range(0, len(values), Query.BATCH):
+            batch = values[x : x + Query.BATCH]
+
+            # Pad parameters with nulls, which never match
+            size = 1 << (len(batch) - 1).bit_length()
+            params = {
+                f"v{y}": batch[y] if y < len(batch) else None for y in range(size)
+            }
+
+            query = Query.BULK.format(
+                columns=columns,
+                field=field,
+                values=", ".join(f":{name}" for name in params),
+            )
+            results.extend(self.embeddings.search(query, len(batch), parameters=params))
+
+        return results
@@ -0,0 +1,59 @@
+"""
+Read-only module
+"""
+
+import sqlite3
+
+from txtai.database import SQLite
+from txtai.embeddings import Embeddings
+
+
+class ReadOnlyEmbeddings(Embeddings):
+    """
+    Embeddings index loaded in read-only mode. The content database is opened read-only with memory-mapped I/O and
+    Faiss IVF indexes are memory-mapped. Multiple processes on the same machine share page cache backed memory instead
+    of each holding a full copy of the index.
+
+    Faiss only memory-maps the inverted lists of IVF indexes. Small indexes are stored as an IDMap over a flat index,
+    which Faiss always reads into process memory, so memory-mapping isn't enabled for those indexes.
+    """
+
+    def loadconfig(self, path):
+        config = super().loadconfig(path)
+
+        # Memory-map Faiss IVF index
+        components = config.get("build", {}).get("settings", {}).get("components", "")
+        if config.get("backend", "faiss") == "faiss" and "IVF" in components:
+            config["faiss"] = {**config.get("faiss", {}), "mmap": True}
+
+        # Open SQLite content database read-only
+        if config.get("content") in (True, "sqlite"):
+            config["content"] = "codequestion.readonly.ReadOnlySQLite"
+
+        return config
+
+    def save(self, path, cloud=None, **kwargs):
+        raise IOError("Unable to save a read-only embeddings index")
+
+
+class ReadOnlySQLite(SQLite):
+    """
+    SQLite content database opened read-only. Pages are read with memory-mapped I/O, which shares the operating system
+    page cache across processes.
+    """
+
+    # Maximum number of bytes of the database file to memory-map. SQLite caps mmap_size at 2147418112 bytes by default
+    # (SQLITE_MAX_MMAP_SIZE), larger values are reduced to this limit. Pages past the limit use regular reads.
+    MMAP_SIZE = 2147418112
+
+    def connect(self, path=""):
+        # Temporary databases are still created in memory
+        if not path:
+            return super().connect(path)
+
+        connection = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        connection.execute(f"PRAGMA mmap_size={ReadOnlySQLite.MMAP_SIZE}")
+
+        return connection
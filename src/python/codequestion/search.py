@@ -4,15 +4,16 @@ Search module
 
 import os
 import os.path
-import re
-
-import html2markdown
 
 from rich.console import Console
 from rich.markdown import Markdown
 from txtai.embeddings import Embeddings
 
+from .answer import Answer
+from .cache import Cache
 from .models import Models
+from .query import Query
+from .readonly import ReadOnlyEmbeddings
 from .tokenizer import Tokenizer
 
 
@@ -21,15 +22,40 @@ class Search:
     Search an embeddings index.
     """
 
-    def __init__(self):
+    # Result columns
+    COLUMNS = "id, score, questionuser, question, tags, date, answeruser, object answer, reference, format"
+
+    def __init__(
+        self, cachesize=1024, cachefile=None, verbose=True, mmap=False, embeddings=None
+    ):
         """
         Creates a new search action.
+
+        Args:
+            cachesize: maximum number of cached query results, 0 disables caching
+            cachefile: optional file used to persist cached query results, defaults to CODEQUESTION_CACHE
+            verbose: if True, prints the model path when loading
+            mmap: if True, the index is memory-mapped read-only, which shares memory across processes
+            embeddings: optional embeddings instance to search, the installed model is loaded when not set
         """
 
         # Load embeddings index
-        self.embeddings = self.load()
+        self.embeddings = embeddings if embeddings else self.load(verbose, mmap)
         self.console = Console()
 
+        # Parameterized query builder
+        self.query = Query(self.embeddings)
+
+        # Query result cache, invalidated when the model directory changes
+        self.cache = Cache(
+            cachesize,
+            cachefile if cachefile else os.environ.get("CODEQUESTION_CACHE"),
+            Cache.directory(Models.modelPath("stackexchange")),
+        )
+
+        # Rendered answers memoized by question id, repeated results skip the markdown conversion
+        self.answers = Cache(256)
+
     def __call__(self, query=None, limit=1, uid=None):
         """
         Runs a search action.
@@ -40,38 +66,136 @@ class Search:
             uid: id to show
         """
 
-        # Query prefix
-        prefix = "select id, score, questionuser, question, tags, date, answeruser, object answer, reference from txtai where"
-
         if uid is not None:
             # ID query
-            query = f"{prefix} id = '{uid}'"
-        elif self.embeddings.isweighted():
-            # Use custom tokenizer for word vector models
-            query = Tokenizer.tokenize(query)
-
-            # Run search and build id query
-            result = self.embeddings.search(query, 1)[0] if query else {}
-            query = f"""
-                select id, {result.get('score')} score, questionuser, question, tags, date, answeruser, object answer, reference
-                from txtai
-                where id = '{result.get('id')}'
-            """
+            results = self.query.match(str(uid), Search.COLUMNS)
         else:
-            # Default similar clause query
-            query = f"{prefix} similar('{query}')"
+            results = self.search(query, limit)
 
         # Render results
-        for result in self.embeddings.search(query, limit):
+        for result in results:
             # Show result
             self.result(result, limit)
 
         self.console.print()
 
-    def load(self):
+    def search(self, query, limit=1):
+        """
+        Runs a search query. Results are cached by normalized query text (or query tokens for weighted models)
+        and limit.
+
+        Args:
+            query: query string
+            limit: maximum number of results
+
+        Returns:
+            list of results, each result is a dict with the fields in Search.COLUMNS
+        """
+
+        # Use custom tokenizer for word vector models
+        tokens = Tokenizer.tokenize(query) if self.embeddings.isweighted() else None
+
+        # Check cache
+        key = Cache.key(query, limit, tokens)
+        results = self.cache.get(key)
+        if results is not None:
+            return results
+
+        if tokens is not None:
+            # Run search and fetch content for all results with a single bulk query
+            results = self.resolve(
+                [self.embeddings.search(tokens, limit) if tokens else []]
+            )[0]
+        else:
+            # Default similar clause query
+            results = self.query.similar(query, Search.COLUMNS, limit)
+
+        self.cache.put(key, results)
+
+        return results
+
+    def batch(self, queries, limit=1, columns=None):
+        """
+        Runs a batch of search queries. Queries are encoded together in a single batch.
+
+        Args:
+            queries: list of query strings
+            limit: maximum number of results per query
+            columns: columns to select, defaults to Search.COLUMNS
+
+        Returns:
+            list of results per query, each result is a dict with the selected columns
+        """
+
+        columns = columns if columns else Search.COLUMNS
+
+        if self.embeddings.isweighted():
+            # Use custom tokenizer for word vector models
+            tokens = Tokenizer.batchtokenize(queries)
+
+            # Run search for queries with at least one token
+            indices = [x for x, query in enumerate(tokens) if query]
+            matches = [[] for _ in queries]
+            if indices:
+                batch = self.embeddings.batchsearch([tokens[x] for x in indices], limit)
+                for x, results in zip(indices, batch):
+                    matches[x] = results
+
+            return self.resolve(matches, columns)
+
+        # Default similar clause query
+        return self.query.batchsimilar(queries, columns, limit)
+
+    def resolve(self, matches, columns=None):
+        """
+        Resolves lists of (id, score) search matches to full results. Content for all matches is fetched
+        with bulk queries.
+
+        Args:
+            matches: list of search matches per query, each match is a dict with id and score
+            columns: columns to select, must include id, defaults to Search.COLUMNS
+
+        Returns:
+            list of results per query, each result is a dict with the selected columns and score
+        """
+
+        # Fetch content for all results
+        content = self.content(
+            [match["id"] for query in matches for match in query], columns
+        )
+
+        return [
+            [
+                dict(content[match["id"]], score=match["score"])
+                for match in query
+                if match["id"] in content
+            ]
+            for query in matches
+        ]
+
+    def content(self, ids, columns=None):
+        """
+        Fetches content for a list of ids with bulk queries.
+
+        Args:
+            ids: list of ids
+            columns: columns to select, must include id, defaults to Search.COLUMNS
+
+        Returns:
+            {id: result}
+        """
+
+        columns = columns if columns else Search.COLUMNS
+        return {result["id"]: result for result in self.query.bulk(ids, columns)}
+
+    def load(self, verbose=True, mmap=False):
         """
         Loads an embeddings model.
 
+        Args:
+            verbose: if True, prints the model path
+            mmap: if True, loads the model read-only with memory-mapped index files
+
         Returns:
             embeddings
         """
@@ -79,8 +203,9 @@ class Search:
         path = Models.modelPath("stackexchange")
 
         if os.path.isfile(os.path.join(path, "config")):
-            print(f"Loading model from {path}")
-            embeddings = Embeddings()
+            if verbose:
+                print(f"Loading model from {path}")
+            embeddings = ReadOnlyEmbeddings() if mmap else Embeddings()
             embeddings.load(path)
         else:
             print("ERROR: loading model: ensure model is installed")
@@ -112,32 +237,46 @@ class Search:
         self.console.print(f"Last Activity: {result['date']}", highlight=False)
         self.console.print(f"Tags: {result['tags']}")
         self.console.print(f"Answer (by {result['answeruser']}):\n", highlight=False)
-        self.console.print(self.markdown(result["answer"]))
+        self.console.print(self.answer(result))
         self.console.print(f"\nReference: {result['reference']}")
 
         # Print results divider
         if limit > 1:
             self.console.rule()
 
-    def markdown(self, text):
+    def answer(self, result):
+        """
+        Renders the answer for a result row. Rendered answers are memoized by question id.
+
+        Args:
+            result: result row
+
+        Returns:
+            answer as markdown
+        """
+
+        answer = self.answers.get(result["id"])
+        if answer is None:
+            answer = self.markdown(result["answer"], result.get("format") != "markdown")
+            self.answers.put(result["id"], answer)
+
+        return answer
+
+    def markdown(self, text, html=True):
         """
         Converts html text to markdown.
 
         Args:
             text: html text
+            html: if False, text is already markdown (precomputed at build time)
 
         Returns:
             text as markdown
         """
 
-        # Remove rel attributes as they are not supported by html2markdown
-        text = re.sub(r' rel=".+?">', ">", text)
-
         # Convert html to markdown
-        text = html2markdown.convert(text)
-
-        # Decode [<>&] characters
-        text = text.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+        if html:
+            text = Answer.markdown(text)
 
         # Wrap as Rich Markdown
         return Markdown(text)
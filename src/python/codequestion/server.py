@@ -0,0 +1,139 @@
+"""
+Server module
+"""
+
+import argparse
+import contextlib
+import io
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .console import Console
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Handles codequestion HTTP requests.
+    """
+
+    # pylint: disable=C0103
+    def do_GET(self):
+        """
+        Handles a GET request.
+        """
+
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+
+        if url.path == "/health":
+            self.send(200, "ok")
+        elif url.path == "/search" and "query" in params:
+            try:
+                limit = int(params.get("limit", ["1"])[0])
+            except ValueError:
+                self.send(400, "limit must be an integer")
+            else:
+                self.send(200, self.server.run(params["query"][0], limit))
+        else:
+            self.send(404, "Not found")
+
+    def send(self, status, text):
+        """
+        Sends a plain text response.
+
+        Args:
+            status: http status code
+            text: response text
+        """
+
+        data = text.encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # pylint: disable=W0622
+    def log_message(self, format, *args):
+        """
+        Disables per request logging.
+        """
+
+
+class Server(ThreadingHTTPServer):
+    """
+    Long-lived codequestion server. Loads the embeddings index once and runs console commands over a local HTTP API.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8010, mmap=False):
+        """
+        Creates a new server.
+
+        Args:
+            host: host to bind
+            port: port to bind
+            mmap: if True, the index is memory-mapped read-only, which shares memory across server processes
+        """
+
+        super().__init__((host, port), Handler)
+
+        # Load console, search and graph actions
+        self.console = Console(mmap=mmap)
+        self.console.preloop()
+        self.console.wait()
+
+        # Commands print output, only run one command at a time
+        self.lock = threading.Lock()
+
+    def run(self, query, limit=1):
+        """
+        Runs a console command and returns the output as text.
+
+        Args:
+            query: search query or console command (.show, .topics, .path)
+            limit: number of results to return
+
+        Returns:
+            command output
+        """
+
+        output = io.StringIO()
+        with self.lock, contextlib.redirect_stdout(output):
+            self.console.limit = limit
+            self.console.default(query)
+
+        return output.getvalue()
+
+
+def main():
+    """
+    Server execution loop.
+    """
+
+    # Command line parser
+    parser = argparse.ArgumentParser(description="codequestion server")
+    parser.add_argument("--host", default="127.0.0.1", help="host to bind")
+    parser.add_argument("--port", type=int, default=8010, help="port to bind")
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="memory-map the index read-only to share memory across processes",
+    )
+
+    # Parse command line arguments
+    args = parser.parse_args()
+
+    server = Server(args.host, args.port, args.mmap)
+    print(f"codequestion server running at http://{args.host}:{args.port}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
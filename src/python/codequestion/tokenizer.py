@@ -2,8 +2,15 @@
 Tokenizer module
 """
 
+import itertools
+import os
 import re
+import sqlite3
 import string
+import sys
+import time
+
+from multiprocessing import Pool
 
 
 class Tokenizer:
@@ -21,6 +28,13 @@ class Tokenizer:
                   "they", "this", "to", "was", "will", "with"}
     # fmt: on
 
+    # Valid token pattern, tokens must be at least 2 characters long
+    PATTERN = re.compile(r"[#*+\-.0-9:@_a-z]{2,}")
+
+    # Cache of lowercase raw tokens to filtered tokens, None if the token is removed
+    CACHE = {}
+    CACHE_SIZE = 100000
+
     @staticmethod
     def tokenize(text):
         """
@@ -33,14 +47,156 @@ class Tokenizer:
             list of tokens
         """
 
+        cache, tokens = Tokenizer.CACHE, []
+
+        # Convert to all lowercase, split on whitespace
+        for raw in text.lower().split():
+            try:
+                token = cache[raw]
+            except KeyError:
+                # Bound cache size
+                if len(cache) >= Tokenizer.CACHE_SIZE:
+                    cache.clear()
+
+                token = cache[raw] = Tokenizer.filter(raw)
+
+            if token is not None:
+                tokens.append(token)
+
+        return tokens
+
+    @staticmethod
+    def reference(text):
+        """
+        Reference tokenizer implementation. This is the original tokenizer, which runs an uncompiled regex match per
+        token. It's the baseline for the micro-benchmark and equivalence tests.
+
+        Args:
+            text: input text
+
+        Returns:
+            list of tokens
+        """
+
         # Convert to all lowercase, split on whitespace, strip punctuation
         tokens = [token.strip(Tokenizer.PUNCTUATION) for token in text.lower().split()]
 
         # Filter tokens that are numbers or a valid string at least 2 characters long. Remove stop words.
-        # Assume tokens already are uncased (all lowercase)
         return [
             token
             for token in tokens
             if (re.match(r"^[#*+\-.0-9:@_a-z]{2,}$", token) or token.isdigit())
             and token not in Tokenizer.STOP_WORDS
         ]
+
+    @staticmethod
+    def batchtokenize(texts):
+        """
+        Tokenizes a list of texts.
+
+        Args:
+            texts: list of input text
+
+        Returns:
+            list of tokens for each input text
+        """
+
+        return [Tokenizer.tokenize(text) for text in texts]
+
+    @staticmethod
+    def filter(token):
+        """
+        Strips punctuation from a lowercase token and checks if it's valid. Tokens must be numbers or a valid string
+        at least 2 characters long. Stop words are removed.
+
+        Args:
+            token: lowercase input token
+
+        Returns:
+            filtered token if valid, None otherwise
+        """
+
+        token = token.strip(Tokenizer.PUNCTUATION)
+        if token not in Tokenizer.STOP_WORDS and (
+            Tokenizer.PATTERN.fullmatch(token) or token.isdigit()
+        ):
+            return token
+
+        return None
+
+    @staticmethod
+    def parallel(texts, workers=None, chunksize=1000):
+        """
+        Tokenizes texts across a pool of worker processes. Texts are submitted in bounded batches of workers * chunksize
+        to keep memory usage flat. This method is a generator and will yield a list of tokens at a time, in input order.
+
+        Args:
+            texts: iterable of input text
+            workers: number of worker processes, defaults to the number of CPUs
+            chunksize: number of texts sent to a worker process at a time
+
+        Returns:
+            lists of tokens
+        """
+
+        workers = workers if workers else os.cpu_count()
+        texts = iter(texts)
+
+        with Pool(workers) as pool:
+            batch = list(itertools.islice(texts, workers * chunksize))
+            while batch:
+                yield from pool.map(Tokenizer.tokenize, batch, chunksize)
+                batch = list(itertools.islice(texts, workers * chunksize))
+
+
+if __name__ == "__main__":
+    # Path to questions.db file
+    dbfile = sys.argv[1] if len(sys.argv) > 1 else None
+    if not dbfile or not os.path.exists(dbfile):
+        print("Path to questions.db file does not exist, exiting")
+        sys.exit()
+
+    # Load question, source and tags text
+    db = sqlite3.connect(dbfile)
+    data = [
+        f"{question} {source} {tags}"
+        for question, source, tags in db.execute(
+            "SELECT Question, Source, Tags FROM questions"
+        )
+    ]
+    db.close()
+
+    # Number of raw tokens, each raw token is one token cache lookup
+    lookups = sum(len(text.split()) for text in data)
+
+    # Run micro-benchmark. Cached runs start with an empty token cache, the uncached run bounds the cache at 0 entries.
+    results, size = [], Tokenizer.CACHE_SIZE
+    for name, method, cachesize in [
+        ("reference", Tokenizer.reference, size),
+        ("tokenize (no cache)", Tokenizer.tokenize, 0),
+        ("tokenize (cold cache)", Tokenizer.tokenize, size),
+        ("tokenize (warm cache)", Tokenizer.tokenize, size),
+    ]:
+        if name != "tokenize (warm cache)":
+            Tokenizer.CACHE.clear()
+
+        Tokenizer.CACHE_SIZE = cachesize
+
+        start = time.perf_counter()
+        tokens = [method(text) for text in data]
+        elapsed = time.perf_counter() - start
+
+        results.append(tokens)
+        count = sum(len(x) for x in tokens)
+
+        print(
+            f"{name:<22} {len(data) / elapsed:12.2f} texts/sec {count / elapsed:12.2f} tokens/sec"
+        )
+
+        # Cache misses on a cold cache are the number of distinct raw tokens, unless the cache was cleared
+        if name == "tokenize (cold cache)" and len(Tokenizer.CACHE) < size:
+            print(f"{'cache hit rate':<22} {1 - len(Tokenizer.CACHE) / lookups:12.2%}")
+
+    Tokenizer.CACHE_SIZE = size
+
+    print(f"Outputs match: {all(tokens == results[0] for tokens in results)}")
@@ -2,16 +2,24 @@
 Topics module
 """
 
+import os
+
 from rich.console import Console
 
 from txtai.embeddings import Embeddings
 
+from .models import Models
+from .query import Query
+
 
 class Topics:
     """
     Query topic models.
     """
 
+    # Topic label embeddings model
+    MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
     def __init__(self, embeddings):
         """
         Creates a new topics action.
@@ -23,9 +31,11 @@ class Topics:
         self.embeddings = embeddings
         self.topics = embeddings.graph.topics
 
-        # Build on-the-fly topics index
-        self.topicembed = Embeddings({"path": "sentence-transformers/all-MiniLM-L6-v2"})
-        self.topicembed.index((x, topic, None) for x, topic in enumerate(self.topics))
+        # Parameterized query builder
+        self.query = Query(embeddings)
+
+        # Topic label index, loaded on first use
+        self.topicembed = None
 
     def __call__(self, query=None):
         """
@@ -39,16 +49,90 @@ class Topics:
 
         topics = list(self.topics.keys())
         if query:
-            results = self.topicembed.search(query, 10)
+            results = [
+                (topic, score)
+                for topic, score in self.index().search(query, 10)
+                if topic in self.topics
+            ]
         else:
-            results = [(x, 1.0) for x in range(10)]
+            results = [(topic, 1.0) for topic in topics[:10]]
+
+        # Filter topics by minimum score
+        topics = [topic for topic, score in results if score >= 0.1]
 
-        for uid, score in results:
-            if score >= 0.1:
-                topic = topics[uid]
-                console.print(f"[bright_green]{topic}[/bright_green]")
+        # Get example questions for all topics with a single query
+        examples = self.examples(topics)
 
-                # Print example question
-                query = f"select id, question from txtai where similar('{topic}')"
-                result = self.embeddings.search(query, 1)[0]
+        for topic in topics:
+            console.print(f"[bright_green]{topic}[/bright_green]")
+
+            # Print example question
+            if topic in examples:
+                result = examples[topic]
                 console.print(f"{result['question']} ({result['id']})\n")
+
+    def examples(self, topics):
+        """
+        Gets an example question for each topic. The example is the representative question of the topic,
+        which is the question with the highest topic rank computed when the graph was built.
+
+        Args:
+            topics: list of topics
+
+        Returns:
+            {topic: result}
+        """
+
+        # Representative node for each topic
+        nodes = {self.topics[topic][0]: topic for topic in topics if self.topics[topic]}
+
+        return {
+            nodes[result["indexid"]]: result
+            for result in self.query.bulk(nodes, "id, indexid, question", "indexid")
+        }
+
+    def index(self):
+        """
+        Gets the topic label index. The index saved at build time is loaded if available, otherwise a new index is built.
+
+        Returns:
+            topic label index
+        """
+
+        if not self.topicembed:
+            path = Topics.path()
+            if os.path.isfile(os.path.join(path, "config")):
+                self.topicembed = Embeddings()
+                self.topicembed.load(path)
+            else:
+                self.topicembed = Topics.build(self.topics)
+
+        return self.topicembed
+
+    @staticmethod
+    def build(topics):
+        """
+        Builds a topic label index. Topic labels are used as ids.
+
+        Args:
+            topics: graph topics
+
+        Returns:
+            topic label index
+        """
+
+        embeddings = Embeddings({"path": Topics.MODEL})
+        embeddings.index((topic, topic, None) for topic in topics)
+
+        return embeddings
+
+    @staticmethod
+    def path():
+        """
+        Topic label index path.
+
+        Returns:
+            path
+        """
+
+        return Models.modelPath("topics")
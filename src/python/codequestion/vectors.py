@@ -2,6 +2,7 @@
 Vectors module
 """
 
+import argparse
 import os
 import os.path
 import sqlite3
@@ -11,6 +12,7 @@ import tempfile
 from tqdm import tqdm
 from txtai.vectors import WordVectors
 
+from .metrics import Metrics
 from .models import Models
 from .tokenizer import Tokenizer
 
@@ -20,17 +22,23 @@ class RowIterator:
     Iterates over rows in a database query. Allows for multiple iterations.
     """
 
-    def __init__(self, dbfile):
+    def __init__(self, dbfile, workers=None, chunksize=1000):
         """
         Initializes RowIterator.
 
         Args:
             dbfile: path to SQLite file
+            workers: number of tokenization worker processes, tokenizes in the current process if None
+            chunksize: number of texts sent to a tokenization worker process at a time
         """
 
         # Store database file
         self.dbfile = dbfile
 
+        # Tokenization settings
+        self.workers = workers
+        self.chunksize = chunksize
+
         self.rows = self.stream(self.dbfile)
 
     def __iter__(self):
@@ -78,12 +86,20 @@ class RowIterator:
         # Query for iterating over questions.db rows
         cur.execute("SELECT Question, Source, Tags FROM questions")
 
-        for question in tqdm(cur, total=total, desc="Tokenizing input"):
-            # Tokenize question, source and tags
-            tokens = Tokenizer.tokenize(
-                question[0] + " " + question[1] + " " + question[2]
-            )
+        # Build question, source and tags text
+        texts = (
+            question[0] + " " + question[1] + " " + question[2]
+            for question in tqdm(cur, total=total, desc="Tokenizing input")
+        )
+
+        # Tokenize text, optionally with a pool of worker processes
+        results = (
+            Tokenizer.parallel(texts, self.workers, self.chunksize)
+            if self.workers
+            else (Tokenizer.tokenize(text) for text in texts)
+        )
 
+        for tokens in results:
             # Skip documents with no tokens parsed
             if tokens:
                 yield tokens
@@ -97,7 +113,7 @@ class Vectors:
     Methods to build a FastText model.
     """
 
-    def __call__(self, dbfile, size, mincount):
+    def __call__(self, dbfile, size, mincount, workers=None, chunksize=1000):
         """
         Converts dbfile into a fastText model using pymagnitude's SQLite output format.
 
@@ -105,26 +121,32 @@ class Vectors:
             dbfile: input SQLite file
             size: dimensions for fastText model
             mincount: minimum number of times a token must appear in input
+            workers: number of tokenization worker processes, tokenizes in the current process if None
+            chunksize: number of texts sent to a tokenization worker process at a time
         """
 
         # Stream tokens to temporary file
-        tokens = self.tokens(dbfile)
+        with Metrics.timer("vectors.tokens"):
+            tokens = self.tokens(dbfile, workers, chunksize)
 
         # Output file path
         path = Models.vectorPath(f"stackexchange-{size}d", True)
 
         # Build word vectors model
-        WordVectors.build(tokens, size, mincount, path)
+        with Metrics.timer("vectors.build"):
+            WordVectors.build(tokens, size, mincount, path)
 
         # Remove temporary tokens file
         os.remove(tokens)
 
-    def tokens(self, dbfile):
+    def tokens(self, dbfile, workers=None, chunksize=1000):
         """
         Iterates over each row in dbfile and writes parsed tokens to a temporary file for processing.
 
         Args:
             dbfile: SQLite file to read
+            workers: number of tokenization worker processes, tokenizes in the current process if None
+            chunksize: number of texts sent to a tokenization worker process at a time
 
         Returns:
             path to output file
@@ -139,20 +161,48 @@ class Vectors:
             # Save file path
             tokens = output.name
 
-            for row in RowIterator(dbfile):
+            count = 0
+            for row in RowIterator(dbfile, workers, chunksize):
                 output.write(" ".join(row) + "\n")
+                count += 1
+
+        Metrics.count("vectors.documents", count)
 
         return tokens
 
 
 # pylint: disable=C0103
 if __name__ == "__main__":
+    # Command line parser
+    parser = argparse.ArgumentParser(description="Vectors")
+    parser.add_argument("dbfile", help="path to questions.db file", metavar="DBFILE")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="number of tokenization worker processes",
+        metavar="WORKERS",
+    )
+    parser.add_argument(
+        "-c",
+        "--chunksize",
+        type=int,
+        default=1000,
+        help="number of texts sent to a tokenization worker process at a time",
+        metavar="CHUNKSIZE",
+    )
+
+    # Parse command line arguments
+    args = parser.parse_args()
+
     # Path to questions.db file
-    dbfile = sys.argv[1] if len(sys.argv) > 1 else None
-    if not dbfile or not os.path.exists(dbfile):
+    if not os.path.exists(args.dbfile):
         print("Path to questions.db file does not exist, exiting")
         sys.exit()
 
     # Resolve questions.db path and run
     vectors = Vectors()
-    vectors(dbfile, 300, 3)
+    vectors(args.dbfile, 300, 3, args.workers, args.chunksize)
+
+    # Print timing and metrics summary
+    Metrics.summary()
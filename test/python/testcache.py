@@ -0,0 +1,91 @@
+"""
+Cache module tests
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+
+from codequestion.cache import Cache
+
+
+class TestCache(unittest.TestCase):
+    """
+    Cache tests.
+    """
+
+    def testConcurrent(self):
+        """
+        Test concurrent access from multiple threads
+        """
+
+        cache = Cache(10)
+
+        def run(x):
+            for y in range(1000):
+                cache.put((x, y % 20), y)
+                cache.get((x, (y + 1) % 20))
+
+        threads = [threading.Thread(target=run, args=(x,)) for x in range(8)]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        stats = cache.stats()
+        self.assertEqual(stats["size"], 10)
+        self.assertEqual(stats["hits"] + stats["misses"], 8000)
+
+    def testDisabled(self):
+        """
+        Test a zero size cache stores nothing
+        """
+
+        cache = Cache(0)
+        cache.put(Cache.key("query", 1), ["result"])
+        self.assertIsNone(cache.get(Cache.key("query", 1)))
+
+    def testEviction(self):
+        """
+        Test least recently used entries are evicted
+        """
+
+        cache = Cache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+
+        # Mark a as recently used, then add a new entry
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats(), {"size": 2, "hits": 2, "misses": 1})
+
+    def testKey(self):
+        """
+        Test query normalization
+        """
+
+        self.assertEqual(
+            Cache.key("How to  undo GIT commit ", 1),
+            Cache.key("how to undo git commit", 1),
+        )
+        self.assertNotEqual(Cache.key("query", 1), Cache.key("query", 2))
+        self.assertEqual(Cache.key("A b", 1, ["b"]), Cache.key("b", 1, ["b"]))
+
+    def testPersist(self):
+        """
+        Test cache is persisted and invalidated when the fingerprint changes
+        """
+
+        path = os.path.join(tempfile.gettempdir(), "codequestion.cache")
+
+        cache = Cache(10, path, "v1")
+        cache.put("a", 1)
+        cache.save()
+
+        self.assertEqual(Cache(10, path, "v1").get("a"), 1)
+        self.assertIsNone(Cache(10, path, "v2").get("a"))
@@ -10,6 +10,7 @@ import unittest
 from codequestion.console import Console
 from codequestion.etl.stackexchange import Execute
 from codequestion.index import Index
+from codequestion.topics import Topics
 
 # pylint: disable=C0411
 from utils import Utils
@@ -41,6 +42,31 @@ class TestConsole(unittest.TestCase):
         cls.console = Console()
         cls.console.preloop()
 
+    def testExit(self):
+        """
+        Test exit commands save the query result cache
+        """
+
+        path = Utils.PATH + "/console.cache"
+        if os.path.exists(path):
+            os.remove(path)
+
+        os.environ["CODEQUESTION_CACHE"] = path
+
+        try:
+            console = Console()
+            console.preloop()
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                console.onecmd("ai")
+                self.assertTrue(console.onecmd("quit"))
+                self.assertTrue(console.onecmd("EOF"))
+                console.postloop()
+        finally:
+            del os.environ["CODEQUESTION_CACHE"]
+
+        self.assertTrue(os.path.exists(path))
+
     def testHelp(self):
         """
         Test help command
@@ -85,6 +111,10 @@ class TestConsole(unittest.TestCase):
         self.assertNotIn("ERROR", self.command(".topics"))
         self.assertNotIn("ERROR", self.command(".topics ai"))
 
+        # Topic label index is saved at index time and loaded on first use
+        self.assertTrue(os.path.exists(Topics.path()))
+        self.assertIsNotNone(self.console.topics.topicembed)
+
     def command(self, command):
         """
         Runs a console command.
@@ -0,0 +1,167 @@
+"""
+DB2QA module tests
+"""
+
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from codequestion.answer import Answer
+from codequestion.etl.stackexchange import DB2QA, XML2DB
+
+
+class TestDB2QA(unittest.TestCase):
+    """
+    DB2QA tests.
+    """
+
+    # Test posts
+    POSTS = [
+        # Question with display name, accepted answer without display name
+        '<row Id="1" PostTypeId="1" AcceptedAnswerId="2" OwnerUserId="10" OwnerDisplayName="alice" '
+        'LastActivityDate="2020-01-01T00:00:00.000" Title="First question" Tags="&lt;python&gt;&lt;sqlite&gt;" />',
+        '<row Id="2" PostTypeId="2" ParentId="1" OwnerUserId="20" Body="&lt;p&gt;First answer&lt;/p&gt;" />',
+        # Question with a missing accepted answer
+        '<row Id="3" PostTypeId="1" AcceptedAnswerId="99" OwnerUserId="10" '
+        'LastActivityDate="2020-01-02T00:00:00.000" Title="Missing answer" Tags="&lt;python&gt;" />',
+        # Question with an empty accepted answer
+        '<row Id="4" PostTypeId="1" AcceptedAnswerId="5" OwnerUserId="10" '
+        'LastActivityDate="2020-01-03T00:00:00.000" Title="Empty answer" Tags="&lt;python&gt;" />',
+        '<row Id="5" PostTypeId="2" ParentId="4" OwnerUserId="20" Body="" />',
+        # Question without display name, accepted answer with display name
+        '<row Id="6" PostTypeId="1" AcceptedAnswerId="7" OwnerUserId="30" '
+        'LastActivityDate="2020-01-04T00:00:00.000" Title="Second question" Tags="&lt;java&gt;" />',
+        '<row Id="7" PostTypeId="2" ParentId="6" OwnerUserId="40" OwnerDisplayName="bob" '
+        'Body="&lt;p&gt;Second &lt;code&gt;answer&lt;/code&gt;&lt;/p&gt;" />',
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Create test source database.
+        """
+
+        cls.path = os.path.join(tempfile.gettempdir(), "db2qa")
+        os.makedirs(cls.path, exist_ok=True)
+
+        cls.dbfile = os.path.join(cls.path, "ai.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            XML2DB()(
+                ["<posts>\n"] + [f"{post}\n" for post in cls.POSTS] + ["</posts>\n"],
+                cls.dbfile,
+            )
+
+    def testBuild(self):
+        """
+        Test questions are joined with accepted answers
+        """
+
+        self.assertEqual(
+            self.build(),
+            [
+                (
+                    0,
+                    "ai",
+                    1,
+                    "2020-01-01T00:00:00.000",
+                    "python sqlite",
+                    "First question",
+                    "alice",
+                    "<p>First answer</p>",
+                    "20",
+                    "https://ai.stackexchange.com/questions/1",
+                    None,
+                ),
+                (
+                    1,
+                    "ai",
+                    6,
+                    "2020-01-04T00:00:00.000",
+                    "java",
+                    "Second question",
+                    "30",
+                    "<p>Second <code>answer</code></p>",
+                    "bob",
+                    "https://ai.stackexchange.com/questions/6",
+                    None,
+                ),
+            ],
+        )
+
+    def testBuildMarkdown(self):
+        """
+        Test answers are precomputed as markdown
+        """
+
+        rows = self.build(DB2QA(markdown=True))
+        self.assertEqual(
+            [row[-1] for row in rows], [Answer.markdown(row[7]) for row in rows]
+        )
+
+    def testMarkdown(self):
+        """
+        Test switching the markdown setting between incremental runs doesn't mark rows as changed
+        """
+
+        # First incremental build tracks all rows as inserts
+        rows = self.build(incremental=True, clean=True)
+        self.assertEqual(self.changes(), {"insert": 2})
+
+        markdown = [Answer.markdown(row[7]) for row in rows]
+
+        # Enable markdown
+        rows = self.build(DB2QA(markdown=True), True)
+        self.assertEqual(self.changes(), {})
+        self.assertEqual([row[-1] for row in rows], markdown)
+
+        # Disable markdown, stored markdown is kept
+        rows = self.build(incremental=True)
+        self.assertEqual(self.changes(), {})
+        self.assertEqual([row[-1] for row in rows], markdown)
+
+    def build(self, db2qa=None, incremental=False, clean=False):
+        """
+        Builds a questions database from the test source database.
+
+        Args:
+            db2qa: DB2QA instance
+            incremental: if True, runs an incremental update
+            clean: if True, deletes an existing questions database first
+
+        Returns:
+            question rows
+        """
+
+        qafile = os.path.join(self.path, "questions.db")
+        if (clean or not incremental) and os.path.exists(qafile):
+            os.remove(qafile)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            (db2qa if db2qa else DB2QA())([self.dbfile], qafile, incremental)
+
+        db = sqlite3.connect(qafile)
+        rows = db.execute("SELECT * FROM questions ORDER BY Id").fetchall()
+        db.close()
+
+        return rows
+
+    def changes(self):
+        """
+        Reads the changes table of the questions database.
+
+        Returns:
+            {action: count}
+        """
+
+        db = sqlite3.connect(os.path.join(self.path, "questions.db"))
+        changes = dict(
+            db.execute(
+                "SELECT Action, count(*) FROM changes GROUP BY Action"
+            ).fetchall()
+        )
+        db.close()
+
+        return changes
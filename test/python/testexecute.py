@@ -0,0 +1,89 @@
+"""
+Execute module tests
+"""
+
+import contextlib
+import io
+import os
+import sqlite3
+import subprocess
+import sys
+import unittest
+
+from unittest import mock
+
+from codequestion.etl.stackexchange import Decompress, Execute
+
+# pylint: disable=C0411
+from utils import Utils
+
+
+class TestExecute(unittest.TestCase):
+    """
+    Execute tests.
+    """
+
+    def testDecompressError(self):
+        """
+        Test a failed extract raises an error in stream mode
+        """
+
+        # Python exits with an error when run with 7za arguments
+        with mock.patch.object(Decompress, "binary", return_value=sys.executable):
+            with contextlib.redirect_stdout(io.StringIO()):
+                with self.assertRaises(subprocess.CalledProcessError):
+                    list(Decompress().stream(Utils.STACKEXCHANGE + "/ai"))
+
+    def testParallel(self):
+        """
+        Test parallel sources report failures and raise an error
+        """
+
+        # The vi source has no raw data in the test directory
+        execute = Execute({"sources": ["ai", "vi"]})
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            with self.assertRaises(RuntimeError) as context:
+                execute.process(Utils.STACKEXCHANGE, 2)
+
+        output = output.getvalue()
+        self.assertIn("ai completed", output)
+        self.assertIn("vi FAILED", output)
+        self.assertIn("ERROR: vi", output)
+        self.assertEqual(str(context.exception), "Failed to process sources: vi")
+
+    def testSources(self):
+        """
+        Test unknown sources raise an error
+        """
+
+        with self.assertRaises(ValueError) as context:
+            Execute({"sources": ["ai", "unknown"]})
+
+        self.assertIn("Unknown sources: unknown.", str(context.exception))
+
+    def testStream(self):
+        """
+        Test stream mode builds the same database as file mode
+        """
+
+        execute = Execute({"sources": ["ai"]})
+
+        rows = []
+        for stream in [False, True]:
+            with contextlib.redirect_stdout(io.StringIO()):
+                dbfile = execute.run(Utils.STACKEXCHANGE, "ai", stream)
+
+            db = sqlite3.connect(dbfile)
+            rows.append(
+                [
+                    db.execute(f"SELECT * FROM {table} ORDER BY Id").fetchall()
+                    for table in ["questions", "answers"]
+                ]
+            )
+            db.close()
+
+        self.assertTrue(os.path.exists(dbfile))
+        self.assertGreater(len(rows[0][0]), 0)
+        self.assertEqual(rows[0], rows[1])
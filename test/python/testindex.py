@@ -2,13 +2,28 @@
 Index module tests
 """
 
+import asyncio
 import contextlib
 import io
+import json
 import os
+import shutil
+import sqlite3
 import unittest
 
+from unittest import mock
+
+from txtai.embeddings import Embeddings
+
+from codequestion.answer import Answer
+from codequestion.asyncsearch import AsyncSearch
+from codequestion.batch import Batch
+from codequestion.benchmark import Benchmark
+from codequestion.etl.stackexchange import DB2QA
 from codequestion.evaluate import StackExchange, STS
-from codequestion.index import Index
+from codequestion.index import Index, TokenCache
+from codequestion.models import Models
+from codequestion.readonly import ReadOnlyEmbeddings
 from codequestion.search import Search
 from codequestion.vectors import Vectors
 
@@ -21,6 +36,87 @@ class TestIndex(unittest.TestCase):
     Index tests.
     """
 
+    def testBenchmark(self):
+        """
+        Test performance benchmark
+        """
+
+        benchmark = Benchmark()
+
+        # Generate synthetic questions
+        dbfile = Utils.PATH + "/benchmark.db"
+        benchmark.synthetic(dbfile, 100)
+
+        # Tags are space separated, matching DB2QA
+        db = sqlite3.connect(dbfile)
+        tags = db.execute("SELECT Tags FROM questions").fetchone()[0]
+        db.close()
+        self.assertEqual(len(tags.split()), 2)
+        self.assertNotIn("|", tags)
+
+        results = benchmark(Utils.PATH + "/index.yml", dbfile, 10)
+        self.assertEqual(results["rows"], 100)
+        self.assertEqual(results["query"]["queries"], 10)
+        self.assertTrue(
+            {"stream", "build", "encode", "ann", "save"}.issubset(results["stages"])
+        )
+        self.assertGreater(results["size"], 0)
+
+        # Compare with itself
+        self.assertIn(
+            "query p95", self.command(lambda: benchmark.compare(results, results))
+        )
+
+    def testIncremental(self):
+        """
+        Test incremental build without an existing questions database tracks all rows as inserts
+        """
+
+        qafile = Utils.PATH + "/incremental.db"
+        if os.path.exists(qafile):
+            os.remove(qafile)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            DB2QA()([Utils.STACKEXCHANGE + "/ai/ai.db"], qafile, True)
+
+        db = sqlite3.connect(qafile)
+        questions = db.execute("SELECT count(*) FROM questions").fetchone()[0]
+        changes = db.execute(
+            "SELECT count(*) FROM changes WHERE Action = 'insert'"
+        ).fetchone()[0]
+        db.close()
+
+        self.assertGreater(questions, 0)
+        self.assertEqual(changes, questions)
+
+    def testTokenCache(self):
+        """
+        Test cached token lists are replayed paired with their rows
+        """
+
+        index = Index()
+        words = ["alpha", "bravo", "charlie", "delta", "echo"]
+        rows = [
+            {"id": x, "text": f"{word} sqlite query"} for x, word in enumerate(words)
+        ]
+
+        with TokenCache() as cache:
+            # First pass writes tokens, second pass replays them
+            first = list(index.tokenize((dict(row) for row in rows), cache))
+            second = list(index.tokenize((dict(row) for row in rows), cache))
+
+            self.assertEqual(cache.count, len(rows))
+
+        self.assertTrue(cache.spill.closed)
+        self.assertEqual(first, second)
+        self.assertEqual(
+            [row["text"][0] for row in second], [words[row["id"]] for row in second]
+        )
+
+        # Rows are streamed in Id order on every pass
+        ids = [uid for uid, _, _ in index.stream(Utils.QUESTIONS, Embeddings(), "Test")]
+        self.assertEqual(ids, sorted(ids))
+
     def testTransformers(self):
         """
         Test transformers-backed index
@@ -35,6 +131,75 @@ class TestIndex(unittest.TestCase):
         # Run tests
         self.runTests()
 
+    def testUpdate(self):
+        """
+        Test updating an index with the changes of an incremental ETL run
+        """
+
+        os.environ["CODEQUESTION_HOME"] = Utils.STACKEXCHANGE + ".update"
+
+        path = Utils.PATH + "/update"
+        os.makedirs(path, exist_ok=True)
+
+        source, qafile = path + "/ai.db", path + "/questions.db"
+        shutil.copy(Utils.STACKEXCHANGE + "/ai/ai.db", source)
+        if os.path.exists(qafile):
+            os.remove(qafile)
+
+        # Update requires a changes table
+        with self.assertRaises(ValueError):
+            Index().update(Utils.QUESTIONS)
+
+        # Build questions database and index
+        with contextlib.redirect_stdout(io.StringIO()):
+            DB2QA()([source], qafile, True)
+            Index()(Utils.PATH + "/index.yml", qafile)
+
+        # Remove the first question and add a new question
+        db = sqlite3.connect(qafile)
+        uid, sid = db.execute(
+            "SELECT Id, SourceId FROM questions ORDER BY Id LIMIT 1"
+        ).fetchone()
+        db.close()
+
+        db = sqlite3.connect(source)
+        db.execute("DELETE FROM questions WHERE Id = ?", [sid])
+        db.execute(
+            "INSERT INTO questions (Id, AcceptedAnswerId, LastActivityDate, Title, Tags) VALUES (?, ?, ?, ?, ?)",
+            [
+                10**7,
+                10**7 + 1,
+                "2024-01-01",
+                "Zebra herd migration routes",
+                "<zebra>",
+            ],
+        )
+        db.execute(
+            "INSERT INTO answers (Id, ParentId, Body) VALUES (?, ?, ?)",
+            [10**7 + 1, 10**7, "<p>Zebras follow the rains</p>"],
+        )
+        db.commit()
+        db.close()
+
+        # Run incremental ETL and update index
+        with contextlib.redirect_stdout(io.StringIO()):
+            DB2QA()([source], qafile, True)
+            Index()(None, qafile, True)
+
+        db = sqlite3.connect(qafile)
+        changes = dict(db.execute("SELECT Action, Id FROM changes").fetchall())
+        db.close()
+
+        self.assertEqual(changes["delete"], uid)
+
+        # Inserted question is searchable and deleted question is gone
+        search = Search(cachesize=0)
+        self.assertEqual(
+            search.search("zebra herd migration")[0]["id"], str(changes["insert"])
+        )
+        self.assertEqual(len(search.content([str(changes["insert"])])), 1)
+        self.assertEqual(search.content([str(uid)]), {})
+
     def testWordVectors(self):
         """
         Test word vector-backed index
@@ -59,6 +224,9 @@ class TestIndex(unittest.TestCase):
         """
 
         self.search()
+        self.asearch()
+        self.aclose()
+        self.batch()
         self.stackexchange()
         self.sts()
 
@@ -73,6 +241,109 @@ class TestIndex(unittest.TestCase):
             "machine learning", self.command(lambda: search("machine learning"))
         )
 
+        # Test multiple results
+        self.assertEqual(len(search.search("machine learning", 3)), 3)
+
+        # Test queries with quotes
+        self.assertEqual(
+            len(search.search("machine learning 'quoted' \"query\"", 2)), 2
+        )
+
+        # Test bulk content lookup
+        self.assertEqual(len(search.content(["0", "1", "2"])), 3)
+
+        # Test batch search with custom columns, used by evaluation
+        results = search.batch(["machine learning", "ai"], 2, StackExchange.COLUMNS)
+        self.assertEqual([len(result) for result in results], [2, 2])
+        self.assertTrue({"id", "sourceid", "source"}.issubset(results[0][0].keys()))
+
+        # Test rendered answers are memoized and precomputed markdown isn't converted
+        with mock.patch.object(Answer, "markdown", wraps=Answer.markdown) as markdown:
+            row = {"id": "memo", "answer": "<p>html <b>answer</b></p>"}
+            self.assertIs(search.answer(row), search.answer(dict(row)))
+
+            row = {"id": "precomputed", "answer": "**answer**", "format": "markdown"}
+            self.assertEqual(search.answer(row).markup, "**answer**")
+
+            self.assertEqual(markdown.call_count, 1)
+
+        # Test read-only memory-mapped index returns the same results
+        self.assertEqual(
+            Search(mmap=True).search("machine learning", 3),
+            search.search("machine learning", 3),
+        )
+
+        # Test small IDMap indexes aren't memory-mapped by Faiss
+        config = ReadOnlyEmbeddings().loadconfig(Models.modelPath("stackexchange"))
+        self.assertNotIn("mmap", config.get("faiss", {}))
+        self.assertEqual(config["content"], "codequestion.readonly.ReadOnlySQLite")
+
+    def aclose(self):
+        """
+        Run async search close test with requests in flight.
+        """
+
+        async def run():
+            search = AsyncSearch(batch=1, wait=0)
+            tasks = [
+                asyncio.create_task(search(query, 2))
+                for query in ["machine learning", "ai"] * 5
+            ]
+
+            # Queue requests, then close
+            await asyncio.sleep(0)
+            await search.close()
+
+            return await asyncio.wait_for(
+                asyncio.gather(*tasks, return_exceptions=True), 10
+            )
+
+        results = asyncio.run(run())
+
+        # Every request is resolved, queued requests fail
+        self.assertEqual(len(results), 10)
+        self.assertTrue(all(isinstance(x, (list, RuntimeError)) for x in results))
+        self.assertTrue(any(isinstance(x, RuntimeError) for x in results))
+
+    def asearch(self):
+        """
+        Run async search test.
+        """
+
+        async def run():
+            search = AsyncSearch()
+            results = await asyncio.gather(
+                *[search(query, 2) for query in ["machine learning", "ai"] * 5]
+            )
+
+            metrics = search.metrics()
+            await search.close()
+
+            return results, metrics
+
+        results, metrics = asyncio.run(run())
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(len(results[0]), 2)
+        self.assertIn("machine learning", results[0][0]["question"].lower())
+        self.assertEqual(metrics["requests"], 10)
+        self.assertLess(metrics["batches"], 10)
+
+    def batch(self):
+        """
+        Run batch search test.
+        """
+
+        output = io.StringIO()
+        Batch(Search())(["machine learning", "ai"], output, 2)
+
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(
+            [result["query"] for result in results], ["machine learning", "ai"]
+        )
+        self.assertEqual(len(results[0]["results"]), 2)
+        self.assertIn("machine learning", results[0]["results"][0]["question"].lower())
+
     def stackexchange(self):
         """
         Run stack exchange test.
@@ -86,6 +357,13 @@ class TestIndex(unittest.TestCase):
             "Mean Reciprocal Rank", self.command(lambda: action(Utils.TESTS, "bm25"))
         )
 
+        # Test metrics
+        metrics = {}
+        self.command(lambda: metrics.update(action(Utils.TESTS, None, 2)))
+        self.assertTrue(
+            {"mrr", "recall@1", "recall@10", "ndcg@10"}.issubset(metrics.keys())
+        )
+
     def sts(self):
         """
         Run STS test.
@@ -94,6 +372,11 @@ class TestIndex(unittest.TestCase):
         action = STS()
         self.assertIn("Pearson", self.command(lambda: action(Utils.TESTS, None)))
 
+        # Test metrics
+        metrics = {}
+        self.command(lambda: metrics.update(action(Utils.TESTS, None)))
+        self.assertIn("pearson", metrics)
+
     def command(self, command):
         """
         Runs a console command.
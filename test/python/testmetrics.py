@@ -0,0 +1,86 @@
+"""
+Metrics module tests
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from codequestion.metrics import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    Metrics tests.
+    """
+
+    def setUp(self):
+        """
+        Clears metrics before each test.
+        """
+
+        Metrics.reset()
+
+    def testExport(self):
+        """
+        Test JSON and Prometheus text export
+        """
+
+        with Metrics.timer("stage"):
+            Metrics.count("rows", 10)
+
+        path = os.path.join(tempfile.gettempdir(), "metrics")
+
+        Metrics.export(path + ".json")
+        with open(path + ".json", encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.assertEqual(data["timers"]["stage"]["calls"], 1)
+        self.assertEqual(data["counters"]["rows"], 10)
+
+        Metrics.export(path + ".prom")
+        with open(path + ".prom", encoding="utf-8") as f:
+            text = f.read()
+
+        self.assertIn('codequestion_stage_calls_total{stage="stage"} 1', text)
+        self.assertIn('codequestion_count_total{name="rows"} 10', text)
+
+    def testMerge(self):
+        """
+        Test merging metrics from another process
+        """
+
+        with Metrics.timer("stage"):
+            Metrics.count("rows", 5)
+
+        data = Metrics.data()
+        Metrics.merge(data)
+
+        self.assertEqual(Metrics.timers["stage"]["calls"], 2)
+        self.assertEqual(Metrics.counters["rows"], 10)
+
+    def testProfile(self):
+        """
+        Test profiling hooks
+        """
+
+        os.environ["CODEQUESTION_PROFILE"] = "cprofile,tracemalloc"
+
+        try:
+            with Metrics.timer("outer"):
+                with Metrics.timer("inner"):
+                    data = [0] * 100000
+
+                del data
+        finally:
+            del os.environ["CODEQUESTION_PROFILE"]
+
+        # Nested stage memory is carried up to the enclosing stage
+        self.assertGreater(Metrics.timers["inner"]["memory"], 0)
+        self.assertGreaterEqual(
+            Metrics.timers["outer"]["memory"], Metrics.timers["inner"]["memory"]
+        )
+
+        # Only the outermost stage is profiled
+        self.assertEqual(list(Metrics.profiles), ["outer"])
@@ -0,0 +1,77 @@
+"""
+Server module tests
+"""
+
+import os
+import threading
+import unittest
+
+from codequestion.client import Client
+from codequestion.index import Index
+from codequestion.server import Server
+
+# pylint: disable=C0411
+from utils import Utils
+
+
+class TestServer(unittest.TestCase):
+    """
+    Server tests.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Initialize test data and start server.
+        """
+
+        os.environ["CODEQUESTION_HOME"] = Utils.STACKEXCHANGE + ".server"
+
+        # Create embeddings index
+        index = Index()
+        index(Utils.PATH + "/index.yml", Utils.QUESTIONS)
+
+        # Start server on a background thread
+        cls.server = Server(port=8011)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+        cls.client = Client("http://127.0.0.1:8011")
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Stop server.
+        """
+
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def testAvailable(self):
+        """
+        Test server health check
+        """
+
+        self.assertTrue(self.client.available())
+        self.assertFalse(Client("http://127.0.0.1:8012").available())
+
+    def testPath(self):
+        """
+        Test .path command
+        """
+
+        self.assertIn("1. ", self.client(".path 0 1"))
+
+    def testSearch(self):
+        """
+        Test search
+        """
+
+        self.assertIn("Question", self.client("ai"))
+        self.assertEqual(self.client("ai", 2).count("Question"), 2)
+
+    def testShow(self):
+        """
+        Test .show command
+        """
+
+        self.assertIn("Question", self.client(".show 0"))
@@ -0,0 +1,165 @@
+"""
+Sift module tests
+"""
+
+import os
+import re
+import tempfile
+import unittest
+
+from codequestion.etl.stackexchange import Filters, Sift
+
+
+class TestSift(unittest.TestCase):
+    """
+    Sift tests.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Create test Posts.xml file.
+        """
+
+        cls.path = os.path.join(tempfile.gettempdir(), "sift")
+        os.makedirs(cls.path, exist_ok=True)
+
+        rows = []
+        for x in range(0, 300, 3):
+            # Question, accepted answer and another answer. Every fourth question has a low score.
+            score = 5 if x % 4 == 0 else 20 + x
+            tags = "&lt;python&gt;&lt;pandas&gt;" if x % 2 else "&lt;java&gt;"
+            date = f"{2015 + x % 10}-06-01T00:00:00.000"
+            rows.append(
+                f'  <row Id="{x}" PostTypeId="1" AcceptedAnswerId="{x + 2}" Score="{score}" '
+                f'LastActivityDate="{date}" Title="Question {x}" Tags="{tags}" />\n'
+            )
+            rows.append(
+                f'  <row Id="{x + 1}" PostTypeId="2" ParentId="{x}" Score="1" />\n'
+            )
+            rows.append(
+                f'  <row Id="{x + 2}" PostTypeId="2" ParentId="{x}" Score="1" />\n'
+            )
+
+        cls.infile = os.path.join(cls.path, "Posts.xml")
+        with open(cls.infile, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n<posts>\n')
+            f.writelines(rows)
+            f.write("</posts>\n")
+
+    def testFilter(self):
+        """
+        Test filtering questions and accepted answers
+        """
+
+        output = self.filtered(Sift())
+
+        lines = output.splitlines()
+        self.assertEqual(lines[0], "<posts>")
+        self.assertEqual(lines[-1], "</posts>")
+        self.assertIn('Id="3" PostTypeId="1"', output)
+        self.assertIn('Id="5" PostTypeId="2"', output)
+        self.assertNotIn('Id="4" PostTypeId="2"', output)
+        self.assertNotIn('Id="0" PostTypeId="1"', output)
+
+        # Text lines give the same output as bytes lines
+        with open(self.infile, encoding="utf-8") as f:
+            self.assertEqual("".join(Sift().filter(f)), output)
+
+    def testFilters(self):
+        """
+        Test question filters
+        """
+
+        config = {
+            "score": 100,
+            "tags": {"include": ["pandas", "java"], "exclude": ["python"]},
+            "dates": {"start": "2018-01-01", "end": "2022-01-01"},
+        }
+
+        questions = self.questions(self.filtered(Sift(filters=Filters(config))))
+        self.assertTrue(questions)
+        for question in questions:
+            self.assertGreaterEqual(
+                int(re.search(r'Score="(\d+)"', question).group(1)), 100
+            )
+            self.assertIn("java", question)
+            self.assertRegex(question, r'LastActivityDate="(2018|2019|2020|2021)')
+
+        # Each accepted question keeps its answer
+        output = self.filtered(Sift(filters=Filters(config)))
+        self.assertEqual(output.count('PostTypeId="2"'), len(questions))
+
+        # Source limits
+        config = {"limit": 10, "limits": {"ai": 3}}
+        self.assertEqual(
+            len(self.questions(self.filtered(Sift(filters=Filters(config))))), 10
+        )
+        self.assertEqual(
+            len(self.questions(self.filtered(Sift(filters=Filters(config, "ai"))))), 3
+        )
+
+    def testReference(self):
+        """
+        Test the original text scan gives the same output as the bytes scan
+        """
+
+        outfile = os.path.join(self.path, "Reference.xml")
+        Sift().reference(self.infile, outfile)
+
+        with open(outfile, encoding="utf-8") as f:
+            self.assertEqual(f.read(), self.filtered(Sift()))
+
+    def testSources(self):
+        """
+        Test unknown sources in a filters file raise an error
+        """
+
+        path = os.path.join(self.path, "filters.yml")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("sources: [ai, stackoverfow]\nlimits:\n  unix: 10\n  vim: 5\n")
+
+        with self.assertRaises(ValueError) as context:
+            Filters.load(path)
+
+        self.assertTrue(
+            str(context.exception).startswith(
+                "Unknown sources: stackoverfow, vim. Valid sources: ai, android"
+            )
+        )
+
+        # Known sources load
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("sources: [ai, stackoverflow]\nlimits:\n  unix: 10\n")
+
+        self.assertEqual(Filters.load(path)["sources"], ["ai", "stackoverflow"])
+
+    def questions(self, output):
+        """
+        Gets question lines from sift output.
+
+        Args:
+            output: output text
+
+        Returns:
+            list of question lines
+        """
+
+        return [line for line in output.splitlines() if 'PostTypeId="1"' in line]
+
+    def filtered(self, sift):
+        """
+        Runs sift and reads the output file.
+
+        Args:
+            sift: Sift instance
+
+        Returns:
+            output text
+        """
+
+        outfile = os.path.join(self.path, "Filtered.xml")
+        sift(self.infile, outfile)
+
+        with open(outfile, encoding="utf-8") as f:
+            return f.read()
@@ -0,0 +1,76 @@
+"""
+Tokenizer module tests
+"""
+
+import unittest
+
+from codequestion.index import Index
+from codequestion.tokenizer import Tokenizer
+from codequestion.vectors import RowIterator
+
+# pylint: disable=C0411
+from utils import Utils
+
+
+class TestTokenizer(unittest.TestCase):
+    """
+    Tokenizer tests.
+    """
+
+    def testBatch(self):
+        """
+        Test batch tokenization
+        """
+
+        texts = ["How to list all installed packages", "c++ vs c# performance"]
+        self.assertEqual(
+            Tokenizer.batchtokenize(texts), [Tokenizer.tokenize(text) for text in texts]
+        )
+
+    def testEquivalence(self):
+        """
+        Test tokenizer output matches the reference implementation over a real corpus
+        """
+
+        with open(Utils.TESTS + "/stackexchange/query.txt", encoding="utf-8") as rows:
+            texts = [row.replace("|", " ") for row in rows]
+
+        # Edge cases
+        texts += [
+            "",
+            "C++ C# F# node.js .NET 3.14 v2 x ² ١٢ İstanbul a-b_c:d@e*f",
+            "(hello), [world]! 'quoted' \"double\" --flag ++ ## ... 42",
+        ]
+
+        # Run twice to test cached tokens
+        for _ in range(2):
+            for text in texts:
+                self.assertEqual(Tokenizer.tokenize(text), Tokenizer.reference(text))
+
+    def testParallel(self):
+        """
+        Test parallel tokenization preserves input order
+        """
+
+        texts = [f"question {x} about python" for x in range(100)]
+        self.assertEqual(
+            list(Tokenizer.parallel(texts, 2, 10)), Tokenizer.batchtokenize(texts)
+        )
+
+    def testStreams(self):
+        """
+        Test Vectors and Index streams tokenize the same with worker processes
+        """
+
+        # Vectors rows
+        self.assertEqual(
+            list(RowIterator(Utils.QUESTIONS, 2, 10)),
+            list(RowIterator(Utils.QUESTIONS)),
+        )
+
+        # Index rows
+        rows = [{"id": x, "text": f"question {x} about python"} for x in range(25)]
+        self.assertEqual(
+            list(Index(2, 10).tokenize((dict(row) for row in rows), None)),
+            list(Index().tokenize((dict(row) for row in rows), None)),
+        )
@@ -0,0 +1,116 @@
+"""
+XML2DB module tests
+"""
+
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from codequestion.etl.stackexchange import XML2DB
+
+
+class TestXML2DB(unittest.TestCase):
+    """
+    XML2DB tests.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """
+        Create test Posts.xml file.
+        """
+
+        cls.path = os.path.join(tempfile.gettempdir(), "xml2db")
+        os.makedirs(cls.path, exist_ok=True)
+
+        # 7 questions and 7 answers, not a multiple of the batch size
+        rows = []
+        for x in range(7):
+            rows.append(
+                f'  <row Id="{x * 2}" PostTypeId="1" AcceptedAnswerId="{x * 2 + 1}" Score="{x}" '
+                f'Title="Question {x}" Tags="&lt;python&gt;" />\n'
+            )
+            rows.append(
+                f'  <row Id="{x * 2 + 1}" PostTypeId="2" ParentId="{x * 2}" Score="1" '
+                f'Body="&lt;p&gt;Answer {x}&lt;/p&gt;" />\n'
+            )
+
+        cls.infile = os.path.join(cls.path, "Posts.xml")
+        with open(cls.infile, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n<posts>\n')
+            f.writelines(rows)
+            f.write("</posts>\n")
+
+    def testFile(self):
+        """
+        Test loading a Posts.xml file
+        """
+
+        self.assertEqual(self.load(self.infile, "file.db"), (7, 7))
+
+        # Test column values
+        questions, answers = self.rows("file.db")
+        self.assertEqual(questions[1][:2], (2, 3))
+        self.assertEqual(questions[1][8:10], ("Question 1", "<python>"))
+        self.assertEqual(answers[1][:2], (3, 2))
+        self.assertEqual(answers[1][4], "<p>Answer 1</p>")
+
+    def testStream(self):
+        """
+        Test loading an iterable of xml lines matches loading the file
+        """
+
+        with open(self.infile, encoding="utf-8") as lines:
+            stream = self.load(lines, "stream.db")
+
+        self.assertEqual(stream, self.load(self.infile, "file.db"))
+        self.assertEqual(self.rows("stream.db"), self.rows("file.db"))
+
+    def load(self, infile, name):
+        """
+        Loads infile with a batch size smaller than the number of rows.
+
+        Args:
+            infile: input xml file or iterable of xml lines
+            name: output database name
+
+        Returns:
+            (number of questions, number of answers)
+        """
+
+        dbfile = os.path.join(self.path, name)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            XML2DB(batch=4)(infile, dbfile)
+
+        db = sqlite3.connect(dbfile)
+        counts = tuple(
+            db.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ["questions", "answers"]
+        )
+        db.close()
+
+        return counts
+
+    def rows(self, name):
+        """
+        Reads all rows from a database.
+
+        Args:
+            name: database name
+
+        Returns:
+            (questions, answers)
+        """
+
+        db = sqlite3.connect(os.path.join(self.path, name))
+        rows = tuple(
+            db.execute(f"SELECT * FROM {table} ORDER BY Id").fetchall()
+            for table in ["questions", "answers"]
+        )
+        db.close()
+
+        return rows